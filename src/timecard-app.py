@@ -2,4 +2,7 @@
 
 from timecard.__main__ import main
 
-main()
+# Processes started to read the log run this again, and must not start
+# another copy of the application.
+if __name__ == "__main__":
+    main()
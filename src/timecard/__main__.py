@@ -7,13 +7,19 @@ Track time beautifully.
 """
 
 import logging
-
-from timecard.interface import interface
+import multiprocessing
 
 logging.basicConfig(level=logging.INFO)
 
 
 def main():
+    # Logs may be read in separate processes (see TextLog.read_parallel()),
+    # which, in a frozen build, start by running the program again.
+    multiprocessing.freeze_support()
+    # Importing the interface creates the application, so that must only
+    # happen here, not in those processes.
+    from timecard.interface import interface
+
     return interface.run()
 
 
@@ -0,0 +1,206 @@
+"""Binary Log [Timecard]
+Author(s): Jason C. McDonald
+
+Reads and writes the time log in a compact binary format: a header, followed
+by fixed-width records, followed by a heap of the UTF-8 encoded notes.
+Each record holds the timestamp and duration in seconds, and the offset and
+length of its notes within the heap.
+
+When the same notes are used by many entries, the log is instead written
+with a dictionary: each distinct notes string is stored only once, after
+the records, and each record holds the number of its notes in the dictionary.
+"""
+
+import logging
+import struct
+
+from timecard.data.compression import Compression
+from timecard.data.logentry import LogEntry
+from timecard.data.notepool import NotePool
+
+
+class BinaryLog:
+    MAGIC = b"TCLOG\x00\x01\n"
+    MAGIC_POOLED = b"TCLOG\x00\x02\n"
+    # Magic number and version, number of records
+    HEADER = struct.Struct("<8sQ")
+    # Timestamp, duration, notes offset, notes length
+    RECORD = struct.Struct("<qqQI")
+    # Timestamp, duration, notes code
+    POOLED_RECORD = struct.Struct("<qqI")
+    # Number of notes strings in the dictionary
+    POOL_HEADER = struct.Struct("<Q")
+    # Offset and length of a notes string within the heap
+    POOL_ENTRY = struct.Struct("<QI")
+
+    @classmethod
+    def detect(cls, path):
+        """Returns whether the file at path is a binary log, even if it's
+        compressed.
+        """
+        try:
+            with Compression.open(path) as file:
+                return cls.is_binary(file.read(len(cls.MAGIC)))
+        except FileNotFoundError:
+            return False
+
+    @classmethod
+    def is_binary(cls, data):
+        """Returns whether the data is the start of a binary log."""
+        return data[: len(cls.MAGIC)] in (cls.MAGIC, cls.MAGIC_POOLED)
+
+    @classmethod
+    def layout(cls, data, path):
+        """Work out where the records and notes are in a binary log.
+        If the log was cut short, as many records as possible are kept.
+
+        data -- the contents of the log, as bytes or a memory map
+        path -- the path of the log, for warnings
+
+        Returns the record format, the offset of the first record, the
+        number of records, and a function which takes the values in a
+        record after the timestamp and duration, and returns the notes.
+        """
+        magic, count = cls.HEADER.unpack_from(data)
+        pooled = magic == cls.MAGIC_POOLED
+        record = cls.POOLED_RECORD if pooled else cls.RECORD
+        start = cls.HEADER.size
+        end = start + count * record.size
+
+        if len(data) < end:
+            logging.warning(f"Truncated binary log {path}")
+            count = (len(data) - start) // record.size
+            end = start + count * record.size
+
+        if not pooled:
+
+            def get_notes(offset, length):
+                offset += end
+                return data[offset : offset + length].decode("utf-8", "replace")
+
+            return record, start, count, get_notes
+
+        # The dictionary is small, so it's all read up front.
+        strings = []
+        try:
+            (size,) = cls.POOL_HEADER.unpack_from(data, end)
+            table = end + cls.POOL_HEADER.size
+            heap = table + size * cls.POOL_ENTRY.size
+            for offset, length in cls.POOL_ENTRY.iter_unpack(data[table:heap]):
+                offset += heap
+                strings.append(
+                    data[offset : offset + length].decode("utf-8", "replace")
+                )
+        except struct.error:
+            logging.warning(f"Truncated notes dictionary in {path}")
+
+        def get_notes(code):
+            return strings[code] if code < len(strings) else ""
+
+        return record, start, count, get_notes
+
+    @classmethod
+    def read(cls, path):
+        """Read all the records from a binary log in bulk.
+
+        Yields each entry in the file, in order.
+        """
+        with Compression.open(path) as file:
+            data = file.read()
+        yield from cls.parse(data, path)
+
+    @classmethod
+    def parse(cls, data, path):
+        """Parse the records from the contents of a binary log. If the log
+        was cut short, as many records as possible are kept.
+
+        data -- the contents of the log, as bytes
+        path -- the path of the log, for warnings
+
+        Yields each entry in the log, in order.
+        """
+        record, start, count, get_notes = cls.layout(data, path)
+        for epoch, duration, *notes in record.iter_unpack(
+            memoryview(data)[start : start + count * record.size]
+        ):
+            yield cls.decode(epoch, duration, get_notes(*notes))
+
+    @staticmethod
+    def decode(epoch, duration, notes):
+        """Convert the values of a record to a log entry."""
+        entry = LogEntry(LogEntry.timestamp_from_seconds(epoch))
+        entry.set_duration_from_seconds(duration)
+        entry.set_notes(notes)
+        return entry
+
+    @classmethod
+    def write(cls, file, entries):
+        """Write entries to a file opened in binary mode, with a notes
+        dictionary if that makes the file smaller.
+
+        Returns the number of entries written.
+        """
+        rows = []
+        pool = NotePool()
+        for entry in entries:
+            if entry.timestamp is None:
+                logging.warning("Cannot store entry without a timestamp.")
+                continue
+            rows.append(
+                (
+                    LogEntry.timestamp_to_seconds(entry.timestamp),
+                    entry.duration_as_seconds(),
+                    pool.encode(entry.notes),
+                )
+            )
+        strings = [string.encode("utf-8") for string in pool]
+
+        # Both layouts store the same notes strings; the dictionary just
+        # stores each of them only once.
+        plain = len(rows) * cls.RECORD.size + sum(
+            len(strings[code]) for _, _, code in rows
+        )
+        pooled = (
+            len(rows) * cls.POOLED_RECORD.size
+            + cls.POOL_HEADER.size
+            + len(strings) * cls.POOL_ENTRY.size
+            + sum(len(string) for string in strings)
+        )
+
+        if pooled < plain:
+            cls._write_pooled(file, rows, strings)
+        else:
+            cls._write_plain(file, rows, strings)
+        return len(rows)
+
+    @classmethod
+    def _write_plain(cls, file, rows, strings):
+        """Write records with each entry's notes in the heap."""
+        records = bytearray()
+        heap = bytearray()
+        for epoch, duration, code in rows:
+            notes = strings[code]
+            records += cls.RECORD.pack(epoch, duration, len(heap), len(notes))
+            heap += notes
+
+        file.write(cls.HEADER.pack(cls.MAGIC, len(rows)))
+        file.write(records)
+        file.write(heap)
+
+    @classmethod
+    def _write_pooled(cls, file, rows, strings):
+        """Write records which refer to a dictionary of notes."""
+        records = bytearray()
+        for row in rows:
+            records += cls.POOLED_RECORD.pack(*row)
+        table = bytearray()
+        heap = bytearray()
+        for string in strings:
+            table += cls.POOL_ENTRY.pack(len(heap), len(string))
+            heap += string
+
+        file.write(cls.HEADER.pack(cls.MAGIC_POOLED, len(rows)))
+        file.write(records)
+        file.write(cls.POOL_HEADER.pack(len(strings)))
+        file.write(table)
+        file.write(heap)
@@ -0,0 +1,195 @@
+"""Compression [Timecard]
+Author(s): Jason C. McDonald
+
+Reads and writes log files compressed with gzip, zlib, or lzma (xz), as a
+stream, so the whole file never needs to be held in memory at once.
+Compressed files are recognized by their first few bytes, so a log which
+was compressed by another program can still be read. New files are
+compressed according to their extension.
+"""
+
+import gzip
+import io
+import lzma
+import zlib
+
+
+class _ZlibReader(io.RawIOBase):
+    """Decompresses a zlib stream from a binary file object, which is
+    closed along with the reader.
+    """
+
+    # How much compressed data to read at once.
+    BLOCK_SIZE = 1 << 16
+
+    def __init__(self, file):
+        self._file = file
+        self._decompressor = zlib.decompressobj()
+        self._buffer = b""
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._buffer and not self._decompressor.eof:
+            data = self._file.read(self.BLOCK_SIZE)
+            if not data:
+                # Report a truncated stream, as gzip and lzma do.
+                raise EOFError(
+                    "Compressed file ended before the end-of-stream "
+                    "marker was reached"
+                )
+            self._buffer = self._decompressor.decompress(data)
+        size = min(len(buffer), len(self._buffer))
+        buffer[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+    def close(self):
+        if not self.closed:
+            self._file.close()
+        super().close()
+
+
+class _ZlibWriter(io.RawIOBase):
+    """Compresses a zlib stream to a binary file object, which is left
+    open when the writer is closed.
+    """
+
+    def __init__(self, file):
+        self._file = file
+        self._compressor = zlib.compressobj()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._file.write(self._compressor.compress(data))
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self._file.write(self._compressor.flush())
+        super().close()
+
+
+class Compression:
+    GZIP = "gzip"
+    ZLIB = "zlib"
+    LZMA = "lzma"
+
+    # The compression used for new files with each extension.
+    EXTENSIONS = {
+        ".gz": GZIP,
+        ".zz": ZLIB,
+        ".xz": LZMA,
+        ".lzma": LZMA,
+    }
+
+    # How many bytes at the start of a file are read to recognize it.
+    # zlib streams have no magic number, so some of the data is needed.
+    SAMPLE_SIZE = 1 << 10
+
+    # The errors which reading a damaged (or truncated) file can raise.
+    ERRORS = (EOFError, zlib.error, lzma.LZMAError, gzip.BadGzipFile)
+
+    @classmethod
+    def from_magic(cls, data):
+        """Returns the compression used by data, given the start of it
+        (ideally, SAMPLE_SIZE bytes), or None if it isn't compressed.
+        """
+        if data[:2] == b"\x1f\x8b":
+            return cls.GZIP
+        if data[:6] == b"\xfd7zXZ\x00":
+            return cls.LZMA
+        if cls._is_zlib(data):
+            return cls.ZLIB
+        return None
+
+    @staticmethod
+    def _is_zlib(data):
+        """Returns whether data is the start of a zlib stream.
+
+        A zlib stream only starts with two bytes which make a multiple of
+        31, which plain text often does by chance. So, the stream must also
+        not need a preset dictionary (which is never used for logs), and
+        the rest of the data must decompress, which text all but never does.
+        """
+        if len(data) < 2 or data[0] & 0x0F != 8 or data[0] >> 4 > 7:
+            return False
+        if int.from_bytes(data[:2], "big") % 31 != 0 or data[1] & 0x20:
+            return False
+        try:
+            zlib.decompressobj().decompress(data)
+        except zlib.error:
+            return False
+        return True
+
+    @classmethod
+    def detect(cls, path):
+        """Returns the compression used by the file at path, or None if it
+        isn't compressed (or doesn't exist).
+        """
+        try:
+            with path.open("rb") as file:
+                return cls.from_magic(file.read(cls.SAMPLE_SIZE))
+        except FileNotFoundError:
+            return None
+
+    @classmethod
+    def for_path(cls, path):
+        """Returns the compression to use when writing the file at path:
+        whichever its extension calls for, or otherwise, whichever the file
+        already uses, so compressed files stay compressed.
+        """
+        try:
+            return cls.EXTENSIONS[path.suffix.lower()]
+        except KeyError:
+            return cls.detect(path)
+
+    @classmethod
+    def open(cls, path):
+        """Open a file for reading in binary mode, decompressing it as it's
+        read if necessary. Raises FileNotFoundError if it doesn't exist.
+        """
+        compression = cls.detect(path)
+        if compression == cls.GZIP:
+            return gzip.open(path, "rb")
+        if compression == cls.LZMA:
+            return lzma.open(path, "rb")
+        if compression == cls.ZLIB:
+            return io.BufferedReader(_ZlibReader(path.open("rb")))
+        return path.open("rb")
+
+    @classmethod
+    def salvage(cls, path):
+        """Decompress as much of a damaged (or truncated) file as possible.
+
+        Returns the data which could be decompressed, as bytes.
+        """
+        data = bytearray()
+        try:
+            with cls.open(path) as file:
+                # Only the last small chunk read is lost to the damage.
+                for chunk in iter(lambda: file.read(1 << 12), b""):
+                    data += chunk
+        except cls.ERRORS:
+            pass
+        return bytes(data)
+
+    @classmethod
+    def compress(cls, file, compression):
+        """Wrap a file opened for writing in binary mode, so that whatever
+        is written is compressed. The wrapper must be closed once everything
+        has been written, which leaves the file itself open.
+
+        file -- the file object to write to
+        compression -- the compression to use, or None for none
+        """
+        if compression == cls.GZIP:
+            return gzip.GzipFile(fileobj=file, mode="wb")
+        if compression == cls.LZMA:
+            return lzma.LZMAFile(file, "wb")
+        if compression == cls.ZLIB:
+            return io.BufferedWriter(_ZlibWriter(file))
+        raise ValueError(f"Unknown compression {compression}")
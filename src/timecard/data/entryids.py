@@ -0,0 +1,61 @@
+"""Entry IDs [Timecard]
+Author(s): Jason C. McDonald
+
+Gives entries in the log stable integer IDs, so the interface can keep
+referring to an entry even after its timestamp is changed. IDs are only
+handed out as they're asked for, so a large log needn't be read just to
+number it, and they only last until the program exits.
+"""
+
+
+class EntryIds:
+    """A dense table of entry IDs, with the timestamp of each entry."""
+
+    def __init__(self):
+        # The timestamp of the entry with each ID, or None once it's gone.
+        self._timestamps = []
+        # The ID of the entry at each timestamp.
+        self._ids = dict()
+
+    def __len__(self):
+        return len(self._ids)
+
+    def __contains__(self, timestamp):
+        return timestamp in self._ids
+
+    def get(self, timestamp):
+        """Returns the ID for a timestamp, giving it a new one if needed."""
+        try:
+            return self._ids[timestamp]
+        except KeyError:
+            entry_id = self._ids[timestamp] = len(self._timestamps)
+            self._timestamps.append(timestamp)
+            return entry_id
+
+    def timestamp(self, entry_id):
+        """Returns the timestamp of the entry with an ID, or None if there
+        is no such entry.
+        """
+        if 0 <= entry_id < len(self._timestamps):
+            return self._timestamps[entry_id]
+        return None
+
+    def bind(self, entry_id, timestamp):
+        """Move an existing ID to another timestamp."""
+        old = self._timestamps[entry_id]
+        if old is not None:
+            del self._ids[old]
+        self.discard(timestamp)
+        self._timestamps[entry_id] = timestamp
+        self._ids[timestamp] = entry_id
+
+    def discard(self, timestamp):
+        """Forget the ID of a timestamp, if it has one. (Idempotent.)"""
+        entry_id = self._ids.pop(timestamp, None)
+        if entry_id is not None:
+            self._timestamps[entry_id] = None
+
+    def retain(self, keep):
+        """Forget the ID of every timestamp for which keep() is false."""
+        for timestamp in [t for t in self._ids if not keep(t)]:
+            self.discard(timestamp)
@@ -0,0 +1,190 @@
+"""Entry Store [Timecard]
+Author(s): Jason C. McDonald
+
+Holds the time log in memory as a few compact columns (timestamps and
+durations in seconds, and codes for the notes), kept in order of timestamp,
+instead of as a separate object for every entry. Each distinct notes string
+is only stored once. Log entries are only created when they're accessed.
+"""
+
+import logging
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+
+from timecard.data.logentry import LogEntry
+from timecard.data.notepool import NotePool
+
+
+class EntryStore(MutableMapping):
+    """A mapping of timestamps to log entries, stored in columns."""
+
+    def __init__(self, entries=()):
+        """Create the store from the given entries, which needn't be in
+        order. If a timestamp appears more than once, the last entry wins.
+        """
+        self._pool = NotePool()
+        epochs = array("q")
+        durations = array("q")
+        codes = array("I")
+        for entry in entries:
+            epoch = self._seconds(entry.timestamp)
+            if epoch is None:
+                logging.warning("Cannot store entry without a timestamp.")
+                continue
+            epochs.append(epoch)
+            durations.append(entry.duration_as_seconds())
+            codes.append(self._pool.encode(entry.notes))
+
+        # Logs are usually written in order, so only sort if we must.
+        if any(epochs[i] >= epochs[i + 1] for i in range(len(epochs) - 1)):
+            # Sorting is stable, so later duplicates still come later.
+            order = sorted(range(len(epochs)), key=epochs.__getitem__)
+            # If a timestamp appears more than once, the last entry wins.
+            order = [
+                i
+                for n, i in enumerate(order)
+                if n + 1 == len(order) or epochs[order[n + 1]] != epochs[i]
+            ]
+            epochs = array("q", (epochs[i] for i in order))
+            durations = array("q", (durations[i] for i in order))
+            codes = array("I", (codes[i] for i in order))
+
+        # The timestamp and duration in seconds, and notes code, of each
+        # entry.
+        self._epochs = epochs
+        self._durations = durations
+        self._codes = codes
+
+    @classmethod
+    def from_columns(cls, epochs, durations, codes, strings):
+        """Create the store directly from its columns, as returned by
+        columns(). The timestamps must already be in order, with no
+        duplicates, and every code must be for one of the strings.
+        """
+        store = cls()
+        store._epochs = epochs
+        store._durations = durations
+        store._codes = codes
+        store._pool = NotePool(strings)
+        return store
+
+    def columns(self):
+        """Returns copies of the timestamp, duration, and notes code
+        columns, and the list of notes strings, in order of code.
+        """
+        return (
+            array("q", self._epochs),
+            array("q", self._durations),
+            array("I", self._codes),
+            list(self._pool),
+        )
+
+    @staticmethod
+    def _seconds(key):
+        """Convert a key to seconds since the epoch, or None if it can't be."""
+        try:
+            if key.microsecond:
+                return None
+            return LogEntry.timestamp_to_seconds(key)
+        except (AttributeError, TypeError):
+            return None
+
+    def _find(self, key):
+        """Returns the position of the key in the store, or -1."""
+        epoch = self._seconds(key)
+        if epoch is None:
+            return -1
+        i = bisect_left(self._epochs, epoch)
+        if i < len(self._epochs) and self._epochs[i] == epoch:
+            return i
+        return -1
+
+    def _entry(self, i):
+        """Create the entry at the given position in the store."""
+        entry = LogEntry(LogEntry.timestamp_from_seconds(self._epochs[i]))
+        entry.set_duration_from_seconds(self._durations[i])
+        entry.set_notes(self._pool.decode(self._codes[i]))
+        return entry
+
+    def __getitem__(self, key):
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        return self._entry(i)
+
+    def __contains__(self, key):
+        return self._find(key) >= 0
+
+    def __setitem__(self, key, entry):
+        epoch = self._seconds(key)
+        if epoch is None:
+            logging.warning("Cannot store entry without a timestamp.")
+            return
+
+        i = bisect_left(self._epochs, epoch)
+        if i < len(self._epochs) and self._epochs[i] == epoch:
+            self._durations[i] = entry.duration_as_seconds()
+            self._codes[i] = self._pool.encode(entry.notes)
+        else:
+            self._epochs.insert(i, epoch)
+            self._durations.insert(i, entry.duration_as_seconds())
+            self._codes.insert(i, self._pool.encode(entry.notes))
+
+    def __delitem__(self, key):
+        i = self._find(key)
+        if i < 0:
+            raise KeyError(key)
+        del self._epochs[i]
+        del self._durations[i]
+        del self._codes[i]
+
+    def __iter__(self):
+        for epoch in self._epochs:
+            yield LogEntry.timestamp_from_seconds(epoch)
+
+    def __len__(self):
+        return len(self._epochs)
+
+    def values(self):
+        """Yield every entry, in order."""
+        for i in range(len(self._epochs)):
+            yield self._entry(i)
+
+    def snapshot(self):
+        """Returns an iterator over every entry as of now, even if the
+        store changes while the entries are being read.
+        """
+        return self.iter_columns(*self.columns())
+
+    @staticmethod
+    def iter_columns(epochs, durations, codes, strings):
+        """Yield the entries in the given columns, as from columns()."""
+        for epoch, duration, code in zip(epochs, durations, codes):
+            entry = LogEntry(LogEntry.timestamp_from_seconds(epoch))
+            entry.set_duration_from_seconds(duration)
+            entry.set_notes(strings[code])
+            yield entry
+
+    def irange(self, start=None, end=None, reverse=False):
+        """Yield the entries from start (inclusive) to end (exclusive),
+        in order of timestamp.
+
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        reverse -- if True, yield the latest entries first
+        """
+        low = 0
+        if start is not None:
+            low = bisect_left(
+                self._epochs, LogEntry.timestamp_to_seconds(start)
+            )
+        high = len(self._epochs)
+        if end is not None:
+            high = bisect_left(self._epochs, LogEntry.timestamp_to_seconds(end))
+
+        positions = range(low, high)
+        if reverse:
+            positions = reversed(positions)
+        for i in positions:
+            yield self._entry(i)
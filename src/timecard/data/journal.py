@@ -0,0 +1,238 @@
+"""Journal [Timecard]
+Author(s): Jason C. McDonald
+
+Records changes to the time log as small records appended to a file
+alongside the log, so saving a change doesn't mean rewriting the whole log.
+The journal is replayed on top of the log whenever the log is loaded.
+
+Also compacts the journal back into the log, in the background.
+"""
+
+import logging
+import os
+import threading
+from collections import namedtuple
+
+from timecard.data.compression import Compression
+from timecard.data.settings import Settings
+
+CompactionReport = namedtuple(
+    "CompactionReport", ("bytes_reclaimed", "records_reclaimed")
+)
+
+
+class Journal:
+    ADD = "+"
+    REMOVE = "-"
+    # An update's record is the timestamp of the entry it replaces,
+    # followed by the new entry.
+    UPDATE = "~"
+
+    # How many journal records to allow before compacting automatically.
+    COMPACT_THRESHOLD = 1000
+
+    # The number of records in the journal files.
+    _records = 0
+    # The background compaction thread, if any.
+    _compaction = None
+    # The result of the last finished compaction.
+    _report = None
+
+    @staticmethod
+    def get_path():
+        """Get the journal path for the current log path."""
+        logpath = Settings.get_logpath()
+        return logpath.with_name(f"{logpath.name}.journal")
+
+    @staticmethod
+    def get_compacting_path():
+        """Get the path the journal is moved to while being compacted."""
+        logpath = Settings.get_logpath()
+        return logpath.with_name(f"{logpath.name}.journal.compacting")
+
+    @classmethod
+    def read(cls):
+        """Read the records from the journal, if there is one.
+        Records which cannot be read (such as a partially-written final
+        record) are skipped with a warning. Records from an interrupted
+        compaction are read first.
+
+        Yields the operation and the entry string of each record, in order.
+        (For updates, the entry string is preceded by the timestamp of the
+        entry being replaced, and a pipe.)
+        """
+        cls._records = 0
+        for path in (cls.get_compacting_path(), cls.get_path()):
+            try:
+                with path.open("r", encoding="utf-8") as file:
+                    for lineno, line in enumerate(file, start=1):
+                        # Each record is an operation, followed by the entry.
+                        operation, _, record = line.rstrip("\n").partition("|")
+
+                        if (
+                            operation not in (cls.ADD, cls.REMOVE, cls.UPDATE)
+                            or not record
+                        ):
+                            logging.warning(
+                                f"Invalid record in {path}:{lineno}\n"
+                                f"  {line}"
+                            )
+                            continue
+
+                        cls._records += 1
+                        yield operation, record
+
+            # If no journal exists, there is nothing to replay.
+            except FileNotFoundError:
+                continue
+
+    @classmethod
+    def append(cls, records):
+        """Append records to the journal.
+
+        records -- a sequence of (operation, entry string) pairs
+        """
+        if not records:
+            return
+
+        path = cls.get_path()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as file:
+            file.writelines(
+                f"{operation}|{record}\n" for operation, record in records
+            )
+            # Make sure the records are on disk before we report success.
+            file.flush()
+            os.fsync(file.fileno())
+
+        cls._records += len(records)
+
+    @classmethod
+    def clear(cls):
+        """Remove the journal, once the log itself is up to date."""
+        cls.wait()
+        cls.get_compacting_path().unlink(missing_ok=True)
+        cls.get_path().unlink(missing_ok=True)
+        cls._records = 0
+
+    @classmethod
+    def is_empty(cls):
+        """Returns whether there are no journal records which haven't yet
+        been folded into the log.
+        """
+        return not (
+            cls.get_path().exists() or cls.get_compacting_path().exists()
+        )
+
+    @classmethod
+    def needs_compaction(cls):
+        """Returns whether the journal has grown enough to be compacted."""
+        return cls._records >= cls.COMPACT_THRESHOLD and not cls.is_compacting()
+
+    @classmethod
+    def is_compacting(cls):
+        """Returns whether a compaction is running."""
+        return cls._compaction is not None and cls._compaction.is_alive()
+
+    @classmethod
+    def wait(cls):
+        """Wait for any running compaction to finish."""
+        if cls._compaction is not None:
+            cls._compaction.join()
+            cls._compaction = None
+
+    @classmethod
+    def get_report(cls):
+        """Returns the CompactionReport from the last finished compaction,
+        or None if there hasn't been one.
+        """
+        if cls.is_compacting():
+            return None
+        return cls._report
+
+    @classmethod
+    def compact(cls, write_log, wait=False, on_written=None):
+        """Rewrite the log with the journal folded into it.
+        The journal is set aside first, so new records can be appended
+        while the log is being rewritten in the background. The new log is
+        written to a staging file and moved into place atomically.
+
+        write_log -- a function which writes the complete log to the given
+            binary file object, and returns the number of entries it wrote.
+            This will be called from the compaction thread, so it must
+            not rely on anything that can change in the meantime.
+        wait -- if True, block until the compaction is finished
+        on_written -- a function to call (from the compaction thread) once
+            the new log has been moved into place
+        """
+        if cls.is_compacting():
+            if wait:
+                cls.wait()
+            return
+
+        logpath = Settings.get_logpath()
+        path = cls.get_path()
+        compacting = cls.get_compacting_path()
+
+        # Set the journal aside. If an earlier compaction was interrupted,
+        # its records are still set aside, so add these to them.
+        if path.exists():
+            if compacting.exists():
+                with path.open("r", encoding="utf-8") as file:
+                    records = file.read()
+                with compacting.open("a", encoding="utf-8") as file:
+                    file.write(records)
+                path.unlink()
+            else:
+                path.replace(compacting)
+        cls._records = 0
+
+        def run():
+            staging = logpath.with_name(f"{logpath.name}~")
+            size_before = 0
+            records_before = 0
+            for old in (logpath, compacting):
+                try:
+                    size_before += old.stat().st_size
+                    with Compression.open(old) as file:
+                        for chunk in iter(lambda: file.read(1 << 16), b""):
+                            records_before += chunk.count(b"\n")
+                except FileNotFoundError:
+                    continue
+                except Compression.ERRORS:
+                    # The records which can't be read can't be counted.
+                    pass
+
+            try:
+                logpath.parent.mkdir(parents=True, exist_ok=True)
+                with staging.open("wb") as file:
+                    written = write_log(file)
+                    file.flush()
+                    os.fsync(file.fileno())
+                staging.replace(logpath)
+                compacting.unlink(missing_ok=True)
+            except OSError as e:
+                # The set-aside journal is kept, so nothing is lost.
+                logging.error(f"Could not compact {logpath}: {e}")
+                staging.unlink(missing_ok=True)
+                return
+            if on_written is not None:
+                on_written()
+
+            cls._report = CompactionReport(
+                bytes_reclaimed=size_before - logpath.stat().st_size,
+                records_reclaimed=records_before - written,
+            )
+            logging.info(
+                f"Compacted {logpath}: reclaimed "
+                f"{cls._report.bytes_reclaimed} bytes and "
+                f"{cls._report.records_reclaimed} records."
+            )
+
+        cls._compaction = threading.Thread(
+            target=run, name="timecard-compaction"
+        )
+        cls._compaction.start()
+
+        if wait:
+            cls.wait()
@@ -0,0 +1,270 @@
+"""Lazy Log [Timecard]
+Author(s): Jason C. McDonald
+
+Provides read access to a time log file without loading every entry into
+memory. The file is memory-mapped, and only a compact index of timestamps
+and file offsets is kept. Entries are only read from the file when they're
+actually accessed. Changes are kept in memory until the log is saved.
+"""
+
+import logging
+import mmap
+import re
+from array import array
+from bisect import bisect_left
+from collections.abc import MutableMapping
+from datetime import datetime
+from heapq import merge
+
+from timecard.data.binarylog import BinaryLog
+from timecard.data.logentry import LogEntry
+
+# Lines consisting of exactly three fields, capturing the timestamp.
+TEXT_ENTRY = re.compile(rb"^([^|\n]*)\|[^|\n]*\|[^|\n]*$", re.MULTILINE)
+
+
+class LazyLog(MutableMapping):
+    """A mapping of timestamps to log entries, backed by a log file."""
+
+    def __init__(self, path):
+        self.path = path
+        # Entries added or removed since the file was mapped.
+        self._added = dict()
+        self._removed = set()
+        self._open()
+
+    def _open(self):
+        """Map the file, and index it."""
+        self._map = None
+        self._binary = False
+        # Sorted timestamps (in seconds since the epoch) of the entries in
+        # the file, and the offset of each entry within the file.
+        self._epochs = array("q")
+        self._offsets = array("q")
+
+        try:
+            with self.path.open("rb") as file:
+                # Empty files cannot be mapped, but there's nothing to index.
+                if file.seek(0, 2):
+                    self._map = mmap.mmap(
+                        file.fileno(), 0, access=mmap.ACCESS_READ
+                    )
+        except FileNotFoundError:
+            pass
+
+        if self._map is not None:
+            self._build_index()
+        self._length = len(self._epochs)
+
+    def _build_index(self):
+        """Index the timestamp and offset of every entry in the file."""
+        if BinaryLog.is_binary(self._map):
+            self._binary = True
+            index = self._index_binary()
+        else:
+            index = self._index_text()
+
+        epochs = array("q")
+        offsets = array("q")
+        for epoch, offset in index:
+            epochs.append(epoch)
+            offsets.append(offset)
+
+        # Logs are usually written in order, so only sort if we must.
+        if any(epochs[i] > epochs[i + 1] for i in range(len(epochs) - 1)):
+            # Sorting is stable, so later duplicates still come later.
+            order = sorted(range(len(epochs)), key=epochs.__getitem__)
+            epochs = array("q", (epochs[i] for i in order))
+            offsets = array("q", (offsets[i] for i in order))
+
+        # If a timestamp appears more than once, the last entry wins.
+        for i in range(len(epochs) - 1):
+            if epochs[i] == epochs[i + 1]:
+                break
+        else:
+            self._epochs, self._offsets = epochs, offsets
+            return
+
+        for i, epoch in enumerate(epochs):
+            if i + 1 < len(epochs) and epochs[i + 1] == epoch:
+                continue
+            self._epochs.append(epoch)
+            self._offsets.append(offsets[i])
+
+    def _index_text(self):
+        """Yield the timestamp and offset of each entry in a text log."""
+        for match in TEXT_ENTRY.finditer(self._map):
+            try:
+                fields = (int(n) for n in match.group(1).strip().split(b"-"))
+                timestamp = datetime(*fields)
+            except (TypeError, ValueError):
+                logging.warning(
+                    f"Invalid timestamp in {self.path} at byte "
+                    f"{match.start()}\n  {match.group(0)}"
+                )
+                continue
+            yield LogEntry.timestamp_to_seconds(timestamp), match.start()
+
+    def _index_binary(self):
+        """Yield the timestamp and offset of each record in a binary log."""
+        self._record, start, count, self._get_notes = BinaryLog.layout(
+            self._map, self.path
+        )
+        size = self._record.size
+
+        with memoryview(self._map) as view:
+            records = view[start : start + count * size]
+            for i, record in enumerate(self._record.iter_unpack(records)):
+                yield record[0], start + i * size
+            records.release()
+
+    def _find(self, key):
+        """Returns the position of the key in the index, or -1."""
+        try:
+            if key.microsecond:
+                return -1
+            epoch = LogEntry.timestamp_to_seconds(key)
+        except (AttributeError, TypeError):
+            return -1
+
+        i = bisect_left(self._epochs, epoch)
+        if i < len(self._epochs) and self._epochs[i] == epoch:
+            return i
+        return -1
+
+    def _read(self, offset):
+        """Read the entry at the given offset in the file."""
+        if self._binary:
+            epoch, duration, *notes = self._record.unpack_from(
+                self._map, offset
+            )
+            return BinaryLog.decode(epoch, duration, self._get_notes(*notes))
+
+        end = self._map.find(b"\n", offset)
+        if end < 0:
+            end = len(self._map)
+        return LogEntry.from_string(self._map[offset:end].decode("utf-8"))
+
+    def __getitem__(self, key):
+        try:
+            return self._added[key]
+        except KeyError:
+            pass
+
+        if key not in self._removed:
+            i = self._find(key)
+            if i >= 0:
+                return self._read(self._offsets[i])
+
+        raise KeyError(key)
+
+    def __contains__(self, key):
+        if key in self._added:
+            return True
+        if key in self._removed:
+            return False
+        return self._find(key) >= 0
+
+    def __setitem__(self, key, entry):
+        if key not in self:
+            self._length += 1
+        self._added[key] = entry
+        self._removed.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        self._added.pop(key, None)
+        if self._find(key) >= 0:
+            self._removed.add(key)
+        self._length -= 1
+
+    def __iter__(self):
+        for epoch in self._epochs:
+            key = LogEntry.timestamp_from_seconds(epoch)
+            if key not in self._removed and key not in self._added:
+                yield key
+        yield from self._added
+
+    def __len__(self):
+        return self._length
+
+    def _entries(self, added, removed):
+        """Yield every entry, reading from the file as needed."""
+        for epoch, offset in zip(self._epochs, self._offsets):
+            key = LogEntry.timestamp_from_seconds(epoch)
+            if key not in removed and key not in added:
+                yield self._read(offset)
+        yield from added.values()
+
+    def values(self):
+        """Yield every entry, reading each from the file in turn."""
+        return self._entries(self._added, self._removed)
+
+    def irange(self, start=None, end=None, reverse=False):
+        """Yield the entries from start (inclusive) to end (exclusive),
+        in order of timestamp. The range is found in the file's index, and
+        only the entries in it are read from the file.
+
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        reverse -- if True, yield the latest entries first
+        """
+        low = (
+            0
+            if start is None
+            else bisect_left(self._epochs, LogEntry.timestamp_to_seconds(start))
+        )
+        high = (
+            len(self._epochs)
+            if end is None
+            else bisect_left(self._epochs, LogEntry.timestamp_to_seconds(end))
+        )
+        positions = range(low, high)
+        if reverse:
+            positions = reversed(positions)
+
+        # Each timestamp comes with its position in the index, or -1 if
+        # the entry has been added since the file was mapped.
+        def mapped():
+            for i in positions:
+                key = LogEntry.timestamp_from_seconds(self._epochs[i])
+                if key not in self._removed and key not in self._added:
+                    yield key, i
+
+        added = (
+            (key, -1)
+            for key in sorted(self._added, reverse=reverse)
+            if (start is None or key >= start) and (end is None or key < end)
+        )
+
+        for key, i in merge(
+            mapped(), added, key=lambda item: item[0], reverse=reverse
+        ):
+            yield self._added[key] if i < 0 else self._read(self._offsets[i])
+
+    def snapshot(self):
+        """Yield every entry as of now, even if the log changes while
+        the entries are being read.
+        """
+        return self._entries(dict(self._added), set(self._removed))
+
+    def close(self):
+        """Unmap the file."""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+
+    def reopen(self):
+        """Map and index the file again, such as after it was closed, keeping
+        the changes made since it was first mapped.
+        """
+        self.close()
+        added, removed = self._added, self._removed
+        self._added = dict()
+        self._removed = set()
+        self._open()
+        for key in removed:
+            self.pop(key, None)
+        for key, entry in added.items():
+            self[key] = entry
@@ -0,0 +1,189 @@
+"""Log Cache [Timecard]
+Author(s): Jason C. McDonald
+
+Keeps a copy of the parsed log in a file next to the log, so the next time
+the log is loaded, it can be read in bulk instead of being parsed again.
+The cache is only used if the log's size, modification time, and contents
+are the same as when the cache was written; otherwise, the log is parsed as
+usual, and the cache is written again.
+
+The cache holds the columns of an EntryStore, exactly as they are in
+memory, so it can only be read on the same kind of machine it was written
+on. It's never needed, so if it can't be used for any reason, it's ignored.
+"""
+
+import hashlib
+import logging
+import os
+import struct
+import sys
+from array import array
+
+from timecard.data.entrystore import EntryStore
+
+
+class LogCache:
+    # Magic number and version
+    MAGIC = b"TCCACHE\x01"
+    # Magic number and version, byte order and size of the notes codes,
+    # size, modification time, and digest of the log, number of entries,
+    # number of notes strings, size of the notes heap, and digest of the
+    # rest of the cache
+    HEADER = struct.Struct("<8s1sBQq32sQQQ32s")
+    BYTEORDER = sys.byteorder[0].encode("ascii")
+    # How much of the log to read at once, to work out its digest.
+    BLOCK_SIZE = 1 << 20
+
+    @staticmethod
+    def get_path(path):
+        """Get the cache path for a log path."""
+        return path.with_name(f"{path.name}.cache")
+
+    @staticmethod
+    def _digest(*parts):
+        """Returns the digest of some data."""
+        digest = hashlib.blake2b(digest_size=32)
+        for part in parts:
+            digest.update(part)
+        return digest.digest()
+
+    @classmethod
+    def get_key(cls, path):
+        """Returns the size, modification time, and digest of the log file,
+        which the cache must match to be used. Raises FileNotFoundError if
+        the log doesn't exist.
+        """
+        digest = hashlib.blake2b(digest_size=32)
+        with path.open("rb") as file:
+            stat = os.fstat(file.fileno())
+            for block in iter(lambda: file.read(cls.BLOCK_SIZE), b""):
+                digest.update(block)
+        return stat.st_size, stat.st_mtime_ns, digest.digest()
+
+    @classmethod
+    def read(cls, path, key):
+        """Read the cache for a log file, if it's up to date.
+
+        path -- the path of the log file
+        key -- the key of the log file, from get_key()
+
+        Returns an EntryStore, or None if the cache is missing, out of
+        date, or damaged.
+        """
+        cachepath = cls.get_path(path)
+        try:
+            data = cachepath.read_bytes()
+        except FileNotFoundError:
+            return None
+
+        try:
+            (
+                magic,
+                byteorder,
+                itemsize,
+                size,
+                mtime,
+                digest,
+                count,
+                strings,
+                heap,
+                checksum,
+            ) = cls.HEADER.unpack_from(data)
+        except struct.error:
+            logging.warning(f"Ignoring damaged log cache {cachepath}")
+            return None
+        if (magic, byteorder, itemsize) != (
+            cls.MAGIC,
+            cls.BYTEORDER,
+            array("I").itemsize,
+        ):
+            logging.debug(f"Ignoring log cache {cachepath} from elsewhere")
+            return None
+        if (size, mtime, digest) != key:
+            logging.debug(f"Ignoring out of date log cache {cachepath}")
+            return None
+
+        epochs = array("q")
+        durations = array("q")
+        codes = array("I")
+        lengths = array("I")
+        columns = (
+            (epochs, count),
+            (durations, count),
+            (codes, count),
+            (lengths, strings),
+        )
+
+        # Make sure the file is all there, and undamaged, before reading it.
+        offset = cls.HEADER.size
+        expected = offset + heap
+        for column, length in columns:
+            expected += length * column.itemsize
+        view = memoryview(data)
+        if len(data) != expected or checksum != cls._digest(view[offset:]):
+            logging.warning(f"Ignoring damaged log cache {cachepath}")
+            return None
+
+        for column, length in columns:
+            end = offset + length * column.itemsize
+            column.frombytes(view[offset:end])
+            offset = end
+
+        notes = []
+        for length in lengths:
+            notes.append(str(view[offset : offset + length], "utf-8"))
+            offset += length
+
+        logging.debug(f"Read {count} entries from log cache {cachepath}")
+        return EntryStore.from_columns(epochs, durations, codes, notes)
+
+    @classmethod
+    def write(cls, path, key, columns):
+        """Write the cache for a log file, unless the log has changed
+        since its key was worked out.
+
+        path -- the path of the log file
+        key -- the key of the log file, from get_key()
+        columns -- the columns of the log, from EntryStore.columns()
+        """
+        size, mtime, digest = key
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return
+        if (stat.st_size, stat.st_mtime_ns) != (size, mtime):
+            return
+
+        epochs, durations, codes, strings = columns
+        strings = [string.encode("utf-8") for string in strings]
+        lengths = array("I", (len(string) for string in strings))
+        body = (epochs, durations, codes, lengths, b"".join(strings))
+
+        cachepath = cls.get_path(path)
+        staging = cachepath.with_name(f"{cachepath.name}~")
+        try:
+            with staging.open("wb") as file:
+                file.write(
+                    cls.HEADER.pack(
+                        cls.MAGIC,
+                        cls.BYTEORDER,
+                        codes.itemsize,
+                        size,
+                        mtime,
+                        digest,
+                        len(epochs),
+                        len(strings),
+                        sum(lengths),
+                        cls._digest(*body),
+                    )
+                )
+                file.writelines(body)
+            staging.replace(cachepath)
+        except OSError as e:
+            logging.warning(f"Could not write log cache {cachepath}: {e}")
+            staging.unlink(missing_ok=True)
+
+    @classmethod
+    def remove(cls, path):
+        """Remove the cache for a log file, if there is one."""
+        cls.get_path(path).unlink(missing_ok=True)
@@ -0,0 +1,163 @@
+"""Log Entry [Timecard]
+Author(s): Jason C. McDonald
+
+The class representing a single time log entry.
+"""
+
+from datetime import datetime, timedelta
+
+
+class LogEntry:
+    __slots__ = ("timestamp", "seconds", "_duration", "_duration_str", "notes")
+
+    # Timestamps stored as seconds are counted from this (naive) datetime.
+    EPOCH = datetime(1970, 1, 1)
+
+    def __init__(self, timestamp=None, duration=0, notes=""):
+        """Create a log entry.
+
+        timestamp -- the timestamp as a datetime object
+        duration -- the duration, either as a number of seconds or as an
+            (hours, minutes, seconds) tuple
+        notes -- the activity description string
+        """
+        self.timestamp = timestamp
+        if isinstance(duration, tuple):
+            self.set_duration(*duration)
+        else:
+            self.set_duration_from_seconds(duration)
+        self.notes = notes
+
+    @property
+    def duration(self):
+        """The duration as an (hours, minutes, seconds) tuple.
+        The duration is stored as seconds; this is worked out when needed.
+        """
+        if self._duration is None:
+            hours, seconds = divmod(self.seconds, 3600)
+            minutes, seconds = divmod(seconds, 60)
+            self._duration = (hours, minutes, seconds)
+        return self._duration
+
+    @staticmethod
+    def normalize_timestamp(timestamp):
+        """Normalizes the timestamp, throwing away milliseconds and
+        timezone data.
+
+        timestamp -- the timestamp to normalize
+
+        Returns the normalized timestamp.
+        """
+        return datetime(
+            timestamp.year,
+            timestamp.month,
+            timestamp.day,
+            timestamp.hour,
+            timestamp.minute,
+            timestamp.second,
+        )
+
+    @staticmethod
+    def timestamp_to_seconds(timestamp):
+        """Convert a timestamp to seconds since the epoch."""
+        return (timestamp - LogEntry.EPOCH) // timedelta(seconds=1)
+
+    @staticmethod
+    def timestamp_from_seconds(seconds):
+        """Convert seconds since the epoch to a timestamp."""
+        return LogEntry.EPOCH + timedelta(seconds=seconds)
+
+    def set_timestamp(self, timestamp):
+        """Normalize and set the timestamp."""
+        self.timestamp = LogEntry.normalize_timestamp(timestamp)
+
+    def set_timestamp_from_string(self, timestamp_str):
+        """Set the timestamp from dash-delimited string."""
+        try:
+            ts = [int(n) for n in timestamp_str.split("-")]
+            self.timestamp = datetime(*ts)
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def set_duration(self, hours, minutes, seconds):
+        """Set duration from tuple.
+
+        hours -- the number of hours
+        minutes -- the number of minutes
+        seconds -- the number of seconds
+        """
+        self.set_duration_from_seconds(hours * 3600 + minutes * 60 + seconds)
+
+    def set_duration_from_string(self, duration_str):
+        """Set duration from colon-delimited string."""
+        try:
+            duration = [int(n) for n in duration_str.split(":")]
+            self.set_duration(*duration)
+        except (TypeError, ValueError):
+            return False
+        return True
+
+    def set_duration_from_seconds(self, seconds):
+        """Set duration from a total number of seconds."""
+        self.seconds = seconds
+        # The other forms are worked out again when they're needed.
+        self._duration = None
+        self._duration_str = None
+
+    def duration_as_seconds(self):
+        """Retrieve duration as a total number of seconds."""
+        return self.seconds
+
+    def timestamp_as_string(self):
+        """Retrieve timestamp as dash-delimited string."""
+        return (
+            f"{self.timestamp.year}-{self.timestamp.month}-"
+            f"{self.timestamp.day}-{self.timestamp.hour}-"
+            f"{self.timestamp.minute}-{self.timestamp.second}"
+        )
+
+    def timestamp_as_format(self, format):
+        """Retrieve timestamp according to given format string."""
+        return self.timestamp.strftime(format)
+
+    def duration_as_string(self, as_decimal=False):
+        """Retrieve duration in format HH:MM:SS, or as a decimal number
+        of hours.
+        """
+        if as_decimal:
+            return f"{self.seconds / 3600:.2f}"
+        if self._duration_str is None:
+            hours, minutes, seconds = self.duration
+            self._duration_str = f"{hours:02}:{minutes:02}:{seconds:02}"
+        return self._duration_str
+
+    def set_notes(self, notes):
+        """Retrive note string."""
+        self.notes = notes
+
+    def as_string(self):
+        """Retrieve the entry as a pipe-delimited string, as in the log."""
+        return (
+            f"{self.timestamp_as_string()}|"
+            f"{self.duration_as_string()}|"
+            f"{self.notes}"
+        )
+
+    @staticmethod
+    def from_string(entry_str):
+        """Create a log entry from a pipe-delimited string.
+
+        Returns the new entry, or None if the string doesn't consist of
+        three fields.
+        """
+        # Each entry consists of three fields, separated by pipes
+        entry_raw = entry_str.strip().split("|", 3)
+        if len(entry_raw) != 3:
+            return None
+
+        entry = LogEntry()
+        entry.set_timestamp_from_string(entry_raw[0])
+        entry.set_duration_from_string(entry_raw[1])
+        entry.set_notes(entry_raw[2])
+        return entry
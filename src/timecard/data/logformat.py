@@ -0,0 +1,96 @@
+"""Log Format [Timecard]
+Author(s): Jason C. McDonald
+
+Reads and writes log files in any of the supported formats, compressed
+or not.
+"""
+
+import os
+
+from timecard.data.binarylog import BinaryLog
+from timecard.data.compression import Compression
+from timecard.data.settings import Settings
+from timecard.data.textlog import TextLog
+
+
+class LogFormat:
+    @staticmethod
+    def read(path, parallel=False):
+        """Read the entries from a log file, in whichever format it's in,
+        and whether or not it's compressed.
+        Raises FileNotFoundError if the file doesn't exist.
+
+        path -- the path of the log file
+        parallel -- if True, parse uncompressed text logs using several
+            processes
+
+        Yields each entry in the file, in order.
+        """
+        if BinaryLog.detect(path):
+            return BinaryLog.read(path)
+        if parallel and Compression.detect(path) is None:
+            return TextLog.read_parallel(path)
+        return TextLog.read(path)
+
+    @staticmethod
+    def salvage(path):
+        """Read as many entries as possible from a compressed log file which
+        is damaged (or truncated), and so can't be read with read().
+
+        Yields each entry which could be read, in order.
+        """
+        data = Compression.salvage(path)
+        if BinaryLog.is_binary(data):
+            yield from BinaryLog.parse(data, path)
+            return
+
+        # Only keep complete lines, translating newlines as read() would.
+        data = data[: data.rfind(b"\n") + 1]
+        text = data.decode("utf-8", "replace")
+        entries, _, _ = TextLog.parse(
+            text.replace("\r\n", "\n").replace("\r", "\n")
+        )
+        yield from entries
+
+    @staticmethod
+    def get_writer(logformat=None, path=None):
+        """Get the function for writing entries to a binary file object
+        in the given format, or in the configured format by default.
+
+        logformat -- the format to write, either "text" or "binary"
+        path -- the path of the file which will be written, which decides
+            whether it's compressed; by default, the path of the log
+        """
+        if logformat is None:
+            logformat = Settings.get_logformat()
+        write = BinaryLog.write if logformat == "binary" else TextLog.write
+
+        compression = Compression.for_path(path or Settings.get_logpath())
+        if compression is None:
+            return write
+
+        def write_compressed(file, entries):
+            with Compression.compress(file, compression) as stream:
+                return write(stream, entries)
+
+        return write_compressed
+
+    @classmethod
+    def write(cls, path, entries, logformat=None):
+        """Write entries to a log file in the given format (or in the
+        configured format by default), compressed if its extension calls for
+        it. The entries are written to a staging file first, which then
+        replaces the log file all at once.
+
+        Returns the number of entries written.
+        """
+        writer = cls.get_writer(logformat, path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        staging = path.with_name(f"{path.name}~")
+        with staging.open("wb") as file:
+            count = writer(file, entries)
+            # Make sure it's all on disk before it replaces the log.
+            file.flush()
+            os.fsync(file.fileno())
+        staging.replace(path)
+        return count
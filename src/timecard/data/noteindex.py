@@ -0,0 +1,82 @@
+"""Note Index [Timecard]
+Author(s): Jason C. McDonald
+
+Maps each word in the notes of the log to the timestamps of the entries
+containing it, so entries can be searched for without scanning the log.
+"""
+
+import re
+from bisect import bisect_left, insort
+
+# Notes are split into words, ignoring case and punctuation.
+WORD = re.compile(r"\w+")
+
+
+class NoteIndex:
+    """An inverted index from words to timestamps."""
+
+    def __init__(self, entries=()):
+        # The timestamps of the entries containing each word.
+        self._postings = dict()
+        # Every word in the index, sorted so prefixes can be looked up.
+        self._words = []
+
+        for entry in entries:
+            if entry.timestamp is None:
+                continue
+            for word in self.tokenize(entry.notes):
+                self._postings.setdefault(word, set()).add(entry.timestamp)
+        self._words = sorted(self._postings)
+
+    @staticmethod
+    def tokenize(text):
+        """Returns the set of (lowercase) words in the text."""
+        return set(WORD.findall(text.lower()))
+
+    def add(self, entry):
+        """Index the notes of an entry."""
+        if entry.timestamp is None:
+            return
+        for word in self.tokenize(entry.notes):
+            postings = self._postings.get(word)
+            if postings is None:
+                postings = self._postings[word] = set()
+                insort(self._words, word)
+            postings.add(entry.timestamp)
+
+    def discard(self, entry):
+        """Remove the notes of an entry from the index."""
+        for word in self.tokenize(entry.notes):
+            postings = self._postings.get(word)
+            if postings is None:
+                continue
+            postings.discard(entry.timestamp)
+            if not postings:
+                del self._postings[word]
+                del self._words[bisect_left(self._words, word)]
+
+    def _match(self, prefix):
+        """Returns the timestamps of entries with a word starting with
+        the given prefix.
+        """
+        matches = set()
+        i = bisect_left(self._words, prefix)
+        while i < len(self._words) and self._words[i].startswith(prefix):
+            matches |= self._postings[self._words[i]]
+            i += 1
+        return matches
+
+    def search(self, query):
+        """Returns the set of timestamps of the entries matching every word
+        in the query. Each word matches any word it's the start of, so
+        "proj" matches "project", "projects", and so on.
+        """
+        results = None
+        # Narrow the results down with the rarest words first.
+        for matches in sorted(
+            (self._match(word) for word in self.tokenize(query)), key=len
+        ):
+            results = matches if results is None else results & matches
+            if not results:
+                break
+        return results or set()
@@ -0,0 +1,42 @@
+"""Note Pool [Timecard]
+Author(s): Jason C. McDonald
+
+Keeps a single copy of each distinct notes string in the log, and numbers
+them, so entries can refer to their notes by a small integer code. The same
+few activities tend to be logged over and over, so this saves a lot of
+memory, and entries can be grouped by activity just by comparing codes.
+"""
+
+
+class NotePool:
+    """A table of distinct notes strings, each with an integer code."""
+
+    def __init__(self, strings=()):
+        self._strings = []
+        self._codes = dict()
+        for string in strings:
+            self.encode(string)
+
+    def __len__(self):
+        return len(self._strings)
+
+    def __iter__(self):
+        """Yield each string, in order of code."""
+        return iter(self._strings)
+
+    def encode(self, string):
+        """Returns the code for a string, adding it to the pool if needed."""
+        try:
+            return self._codes[string]
+        except KeyError:
+            code = self._codes[string] = len(self._strings)
+            self._strings.append(string)
+            return code
+
+    def decode(self, code):
+        """Returns the string with the given code."""
+        return self._strings[code]
+
+    def find(self, string):
+        """Returns the code for a string, or None if it isn't in the pool."""
+        return self._codes.get(string)
@@ -0,0 +1,174 @@
+"""Rollups [Timecard]
+Author(s): Jason C. McDonald
+
+Keeps running totals of the time logged on each day, in each (ISO) week,
+and in each month, and for each activity on each day, so totals for any
+period can be looked up without reading through the log. Entries count
+towards the day of their timestamp, as in TimeLog.query_day().
+"""
+
+from bisect import bisect_left
+from collections import Counter
+from datetime import date, timedelta
+
+
+class Rollups:
+    """Duration totals, in seconds, for each day, week, and month."""
+
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+
+    # The ordinal of the day timestamps stored as seconds are counted from.
+    EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+    def __init__(self, entries=()):
+        """Total up the given entries."""
+        days = Counter()
+        activities = Counter()
+        for entry in entries:
+            if entry.timestamp is None:
+                continue
+            day = entry.timestamp.date()
+            seconds = entry.duration_as_seconds()
+            days[day] += seconds
+            activities[day, entry.notes] += seconds
+        self._build(days, activities)
+
+    @classmethod
+    def from_columns(cls, epochs, durations, codes, strings):
+        """Total up the entries in the given columns, as from
+        EntryStore.columns(), without creating an entry for each.
+        """
+        # The columns are in order of timestamp, so each day's entries are
+        # together, and can be added up a day at a time.
+        days = Counter()
+        activities = Counter()
+        low = 0
+        while low < len(epochs):
+            number = epochs[low] // 86400
+            high = bisect_left(epochs, (number + 1) * 86400, low)
+            day = date.fromordinal(cls.EPOCH_ORDINAL + number)
+            days[day] = sum(durations[low:high])
+            totals = Counter()
+            for code, duration in zip(codes[low:high], durations[low:high]):
+                totals[code] += duration
+            for code, seconds in totals.items():
+                activities[day, strings[code]] += seconds
+            low = high
+
+        rollups = cls.__new__(cls)
+        rollups._build(days, activities)
+        return rollups
+
+    def _build(self, days, activities):
+        """Set up the totals from the total for each day, and for each
+        (day, activity).
+        """
+        # The total for each day, week, and month.
+        self._days = days
+        self._weeks = Counter()
+        self._months = Counter()
+        for day, seconds in days.items():
+            self._weeks[self._week(day)] += seconds
+            self._months[self._month(day)] += seconds
+        # The total for each activity on each day.
+        self._activities = dict()
+        for (day, notes), seconds in activities.items():
+            self._activities.setdefault(day, Counter())[notes] = seconds
+
+    @staticmethod
+    def _week(day):
+        """Returns the ISO year and week number of a day."""
+        year, week, _ = day.isocalendar()
+        return year, week
+
+    @staticmethod
+    def _month(day):
+        """Returns the year and month of a day."""
+        return day.year, day.month
+
+    def _change(self, entry, sign):
+        """Add an entry to the totals (sign=1), or take it away (sign=-1)."""
+        if entry.timestamp is None:
+            return
+        day = entry.timestamp.date()
+        seconds = entry.duration_as_seconds() * sign
+        self._days[day] += seconds
+        self._weeks[self._week(day)] += seconds
+        self._months[self._month(day)] += seconds
+
+        activities = self._activities.setdefault(day, Counter())
+        activities[entry.notes] += seconds
+        # Don't keep activities (or days) around once they're gone.
+        if not activities[entry.notes]:
+            del activities[entry.notes]
+            if not activities:
+                del self._activities[day]
+
+    def add(self, entry):
+        """Add an entry to the totals."""
+        self._change(entry, 1)
+
+    def discard(self, entry):
+        """Take an entry away from the totals."""
+        self._change(entry, -1)
+
+    @classmethod
+    def bounds(cls, period, day):
+        """Returns the first day of the period containing a day, and the
+        first day after it.
+
+        period -- one of DAY, WEEK, or MONTH
+        day -- the day as a date (or datetime) object
+        """
+        day = date(day.year, day.month, day.day)
+        if period == cls.DAY:
+            return day, day + timedelta(days=1)
+        if period == cls.WEEK:
+            start = day - timedelta(days=day.weekday())
+            return start, start + timedelta(days=7)
+        if period == cls.MONTH:
+            start = day.replace(day=1)
+            end = (start + timedelta(days=31)).replace(day=1)
+            return start, end
+        raise ValueError(f"Unknown period {period}")
+
+    def total(self, period, day):
+        """Returns the total seconds logged in the period containing a day.
+
+        period -- one of DAY, WEEK, or MONTH
+        day -- the day as a date (or datetime) object
+        """
+        start, _ = self.bounds(period, day)
+        if period == self.DAY:
+            return self._days[start]
+        if period == self.WEEK:
+            return self._weeks[self._week(start)]
+        return self._months[self._month(start)]
+
+    def total_range(self, start, end):
+        """Returns the total seconds logged from the day start up to (but
+        not including) the day end.
+        """
+        total = 0
+        day = date(start.year, start.month, start.day)
+        end = date(end.year, end.month, end.day)
+        while day < end:
+            total += self._days[day]
+            day += timedelta(days=1)
+        return total
+
+    def activities(self, period, day):
+        """Returns a Counter of the total seconds logged for each activity
+        (that is, each distinct notes string) in the period containing a day.
+
+        period -- one of DAY, WEEK, or MONTH
+        day -- the day as a date (or datetime) object
+        """
+        start, end = self.bounds(period, day)
+        totals = Counter()
+        while start < end:
+            totals.update(self._activities.get(start, ()))
+            start += timedelta(days=1)
+        return totals
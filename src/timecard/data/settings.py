@@ -104,6 +104,13 @@ class Settings:
 
         cls._settings["datefmt"] = cls.get_datefmt()
         cls._settings["decdur"] = str(cls.get_decdur())
+        cls._settings["journal"] = str(cls.get_journal())
+        cls._settings["lazyload"] = str(cls.get_lazyload())
+        cls._settings["parallelload"] = str(cls.get_parallelload())
+        cls._settings["logcache"] = str(cls.get_logcache())
+        cls._settings["backend"] = cls.get_backend()
+        cls._settings["shardby"] = cls.get_shardby()
+        cls._settings["logformat"] = cls.get_logformat()
         cls._settings["logdir"] = cls.get_logdir_str()
         cls._settings["logname"] = cls.get_logname()
         cls._settings["persist"] = str(cls.get_persist())
@@ -188,6 +195,124 @@ class Settings:
         """Get the full log path."""
         return cls.get_logdir().joinpath(cls.get_logname())
 
+    @classmethod
+    @settings_getter
+    def get_logformat(cls):
+        """Returns the format the log is saved in: "text" or "binary"."""
+        try:
+            logformat = cls._settings["logformat"]
+        except KeyError:
+            return "text"
+        return logformat if logformat in ("text", "binary") else "text"
+
+    @classmethod
+    @settings_setter
+    def set_logformat(cls, logformat):
+        """Sets the format the log is saved in."""
+        cls._settings["logformat"] = logformat
+
+    @classmethod
+    @settings_getter
+    def get_backend(cls):
+        """Returns where the log is stored: "file" or "sqlite"."""
+        try:
+            backend = cls._settings["backend"]
+        except KeyError:
+            return "file"
+        return backend if backend in ("file", "sqlite") else "file"
+
+    @classmethod
+    @settings_setter
+    def set_backend(cls, backend):
+        """Sets where the log is stored."""
+        cls._settings["backend"] = backend
+
+    @classmethod
+    @settings_getter
+    def get_shardby(cls):
+        """Returns how the log is split into separate files:
+        "none", "month", or "year".
+        """
+        try:
+            shardby = cls._settings["shardby"]
+        except KeyError:
+            return "none"
+        return shardby if shardby in ("none", "month", "year") else "none"
+
+    @classmethod
+    @settings_setter
+    def set_shardby(cls, shardby):
+        """Sets how the log is split into separate files."""
+        cls._settings["shardby"] = shardby
+
+    @classmethod
+    @settings_getter
+    def get_journal(cls):
+        """Returns whether changes to the log should be appended to a
+        journal, instead of rewriting the whole log on every save.
+        """
+        try:
+            return cls._settings["journal"] != "False"
+        except KeyError:
+            return False
+
+    @classmethod
+    @settings_setter
+    def set_journal(cls, journal):
+        """Sets whether changes to the log should be journaled."""
+        cls._settings["journal"] = str(journal)
+
+    @classmethod
+    @settings_getter
+    def get_lazyload(cls):
+        """Returns whether log entries should only be read from the log file
+        as they're needed, instead of all being loaded into memory.
+        """
+        try:
+            return cls._settings["lazyload"] != "False"
+        except KeyError:
+            return False
+
+    @classmethod
+    @settings_setter
+    def set_lazyload(cls, lazyload):
+        """Sets whether log entries should be read on demand."""
+        cls._settings["lazyload"] = str(lazyload)
+
+    @classmethod
+    @settings_getter
+    def get_parallelload(cls):
+        """Returns whether text log files should be parsed using several
+        processes at once.
+        """
+        try:
+            return cls._settings["parallelload"] != "False"
+        except KeyError:
+            return False
+
+    @classmethod
+    @settings_setter
+    def set_parallelload(cls, parallelload):
+        """Sets whether text log files should be parsed in parallel."""
+        cls._settings["parallelload"] = str(parallelload)
+
+    @classmethod
+    @settings_getter
+    def get_logcache(cls):
+        """Returns whether the parsed log should be cached in a file next
+        to the log, so it can be loaded faster next time.
+        """
+        try:
+            return cls._settings["logcache"] != "False"
+        except KeyError:
+            return True
+
+    @classmethod
+    @settings_setter
+    def set_logcache(cls, logcache):
+        """Sets whether the parsed log should be cached."""
+        cls._settings["logcache"] = str(logcache)
+
     @classmethod
     @settings_getter
     def get_persist(cls):
@@ -0,0 +1,298 @@
+"""Shards [Timecard]
+Author(s): Jason C. McDonald
+
+Splits the time log into one file per month (or per year), so that only
+the parts of the log which are actually used ever need to be loaded or
+saved. A small manifest alongside the shards lists them all, along with
+how many entries are in each.
+"""
+
+import logging
+import os
+from collections.abc import MutableMapping
+from itertools import chain
+
+from timecard.data.logcache import LogCache
+from timecard.data.logformat import LogFormat
+from timecard.data.timeindex import TimeIndex
+
+
+class ShardedLog(MutableMapping):
+    """A mapping of timestamps to log entries, split across shard files
+    which are each loaded the first time they're needed.
+    """
+
+    PERIODS = ("month", "year")
+
+    def __init__(self, path, period=None):
+        """Open the sharded log for the given log path.
+        An existing unsharded log at that path is split into shards, and
+        existing shards for a different period are split up again. Either
+        way, the old files are kept as backups (with ".bak" added to their
+        names) on the next save.
+
+        path -- the path of the (unsharded) log
+        period -- "month" or "year", or None to use the existing period
+        """
+        self.path = path
+        self.period = period
+        # The entries in each shard, or None if the shard isn't loaded.
+        self._shards = dict()
+        self._counts = dict()
+        # The sorted timestamps in each shard, once they're needed.
+        self._indexes = dict()
+        # Shards which have changed since they were last saved.
+        self._dirty = set()
+        # Files to set aside once the shards have been saved.
+        self._obsolete = set()
+
+        manifest = self.get_manifest_path(path)
+        if manifest.exists():
+            self._read_manifest(manifest)
+        else:
+            self.period = period or self.PERIODS[0]
+            try:
+                self._split(LogFormat.read(path))
+            except FileNotFoundError:
+                pass
+            else:
+                self._obsolete.add(path)
+
+    @staticmethod
+    def get_manifest_path(path):
+        """Get the manifest path for the given log path."""
+        return path.with_name(f"{path.name}.shards")
+
+    @classmethod
+    def exists(cls, path):
+        """Returns whether the log at the given path has been sharded."""
+        return cls.get_manifest_path(path).exists()
+
+    def get_shard_path(self, key):
+        """Get the path of the shard file with the given key."""
+        return self.path.with_name(f"{self.path.stem}-{key}{self.path.suffix}")
+
+    def _read_manifest(self, manifest):
+        """Read the list of shards from the manifest."""
+        with manifest.open("r", encoding="utf-8") as file:
+            lines = [line.strip() for line in file if line.strip()]
+
+        # The first line is the period, and each line after is a shard.
+        period = lines[0] if lines else self.PERIODS[0]
+        for lineno, line in enumerate(lines[1:], start=2):
+            key, _, count = line.partition("|")
+            try:
+                self._counts[key] = int(count)
+            except ValueError:
+                logging.warning(
+                    f"Invalid shard in {manifest}:{lineno}\n" f"  {line}"
+                )
+                continue
+            self._shards[key] = None
+
+        if self.period is None or self.period == period:
+            self.period = period
+            return
+
+        # Split the old shards up by the new period.
+        paths = [self.get_shard_path(key) for key in self._shards]
+        self._shards.clear()
+        self._counts.clear()
+        self._split(chain.from_iterable(self._read(path) for path in paths))
+        self._obsolete.update(paths)
+
+    def _split(self, entries):
+        """Add entries to whichever shards they belong in."""
+        for entry in entries:
+            self[entry.timestamp] = entry
+
+    @staticmethod
+    def _read(path):
+        """Read the entries from a shard file."""
+        try:
+            yield from LogFormat.read(path)
+        except FileNotFoundError:
+            logging.warning(f"Missing shard {path}")
+
+    def _key(self, timestamp):
+        """Get the key of the shard the timestamp belongs in,
+        or None if it can't belong in any shard.
+        """
+        try:
+            if self.period == "year":
+                return f"{timestamp.year:04}"
+            return f"{timestamp.year:04}-{timestamp.month:02}"
+        except AttributeError:
+            return None
+
+    def _shard(self, key, create=False):
+        """Get the entries in a shard, loading it if necessary.
+
+        key -- the key of the shard
+        create -- if True, create the shard if it doesn't exist yet
+
+        Returns the shard's entries, or None if there's no such shard.
+        """
+        if key not in self._shards:
+            if not create:
+                return None
+            self._shards[key] = dict()
+            self._counts[key] = 0
+
+        shard = self._shards[key]
+        if shard is None:
+            logging.debug(f"Loading shard {key}")
+            shard = dict()
+            for entry in self._read(self.get_shard_path(key)):
+                shard[entry.timestamp] = entry
+            self._shards[key] = shard
+            self._counts[key] = len(shard)
+        return shard
+
+    def __getitem__(self, key):
+        shard = self._shard(self._key(key))
+        if shard is None:
+            raise KeyError(key)
+        return shard[key]
+
+    def __contains__(self, key):
+        shard = self._shard(self._key(key))
+        return shard is not None and key in shard
+
+    def __setitem__(self, key, entry):
+        shard_key = self._key(key)
+        if shard_key is None:
+            logging.warning("Cannot store entry without a timestamp.")
+            return
+
+        shard = self._shard(shard_key, create=True)
+        shard[key] = entry
+        self._counts[shard_key] = len(shard)
+        self._dirty.add(shard_key)
+        if shard_key in self._indexes:
+            self._indexes[shard_key].add(key)
+
+    def __delitem__(self, key):
+        shard_key = self._key(key)
+        shard = self._shard(shard_key)
+        if shard is None:
+            raise KeyError(key)
+
+        del shard[key]
+        self._counts[shard_key] = len(shard)
+        self._dirty.add(shard_key)
+        if shard_key in self._indexes:
+            self._indexes[shard_key].discard(key)
+
+    def __iter__(self):
+        for key in sorted(self._shards):
+            yield from self._shard(key)
+
+    def __len__(self):
+        return sum(self._counts.values())
+
+    def values(self):
+        """Yield every entry, loading every shard in turn."""
+        for key in sorted(self._shards):
+            yield from self._shard(key).values()
+
+    def irange(self, start=None, end=None, reverse=False):
+        """Yield the entries from start (inclusive) to end (exclusive),
+        in order of timestamp. Only the shards in that range are loaded.
+
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        reverse -- if True, yield the latest entries first
+        """
+        first = None if start is None else self._key(start)
+        last = None if end is None else self._key(end)
+        keys = [
+            key
+            for key in sorted(self._shards, reverse=reverse)
+            if (first is None or key >= first) and (last is None or key <= last)
+        ]
+
+        for key in keys:
+            shard = self._shard(key)
+            if key not in self._indexes:
+                self._indexes[key] = TimeIndex(shard)
+            for timestamp in self._indexes[key].irange(start, end, reverse):
+                yield shard[timestamp]
+
+    def is_dirty(self):
+        """Returns whether there are changes which haven't been saved."""
+        return bool(self._dirty or self._obsolete)
+
+    def save(self, logformat=None):
+        """Write out the shards which have changed, and the manifest.
+
+        logformat -- the format to write the shards in, or None to use
+            the configured format
+        """
+        for key in sorted(self._dirty):
+            shard = self._shards[key]
+            path = self.get_shard_path(key)
+            if shard:
+                LogFormat.write(path, shard.values(), logformat)
+            else:
+                # Don't keep empty shards around.
+                path.unlink(missing_ok=True)
+                del self._shards[key]
+                del self._counts[key]
+                self._indexes.pop(key, None)
+        self._dirty.clear()
+
+        self._write_manifest()
+
+        # Only now is it safe to set aside anything the shards replaced.
+        current = {self.get_shard_path(key) for key in self._shards}
+        for path in self._obsolete - current:
+            self._backup_file(path)
+            if path == self.path:
+                # The unsharded log is gone, so its cache is no use.
+                LogCache.remove(path)
+        self._obsolete.clear()
+
+    def rewrite(self, logformat=None):
+        """Write out every shard, such as when converting the format."""
+        for key in list(self._shards):
+            self._shard(key)
+        self._dirty.update(self._shards)
+        self.save(logformat)
+
+    def _write_manifest(self):
+        """Write the list of shards to the manifest."""
+        manifest = self.get_manifest_path(self.path)
+        staging = manifest.with_name(f"{manifest.name}~")
+        manifest.parent.mkdir(parents=True, exist_ok=True)
+        with staging.open("w", encoding="utf-8") as file:
+            file.write(f"{self.period}\n")
+            for key in sorted(self._shards):
+                file.write(f"{key}|{self._counts[key]}\n")
+            file.flush()
+            os.fsync(file.fileno())
+        staging.replace(manifest)
+
+    @staticmethod
+    def _backup_file(path):
+        """Keep a file as a backup, with ".bak" added to its name."""
+        try:
+            path.replace(path.with_name(f"{path.name}.bak"))
+        except FileNotFoundError:
+            pass
+
+    def backup(self):
+        """Keep all the shard files and the manifest, along with any files
+        the shards were split from, as backups (with ".bak" added to their
+        names), such as once the log has been moved out of them.
+        """
+        paths = {self.get_shard_path(key) for key in self._shards}
+        paths |= self._obsolete
+        paths.add(self.get_manifest_path(self.path))
+        for path in paths:
+            self._backup_file(path)
+        self._obsolete.clear()
+        self._shards.clear()
+        self._counts.clear()
+        self._indexes.clear()
+        self._dirty.clear()
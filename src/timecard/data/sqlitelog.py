@@ -0,0 +1,251 @@
+"""SQLite Log [Timecard]
+Author(s): Jason C. McDonald
+
+Stores the time log in an SQLite database, instead of a flat file.
+Entries are looked up, added, and removed with indexed queries, so the log
+never needs to be held in memory or rewritten in full. Notes are searched,
+and time is totalled up, by the database as well.
+"""
+
+import logging
+import sqlite3
+from collections import Counter
+from collections.abc import MutableMapping
+
+from timecard.data.logentry import LogEntry
+from timecard.data.noteindex import NoteIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS log (
+    timestamp INTEGER PRIMARY KEY,
+    duration INTEGER NOT NULL,
+    notes TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS log_notes ON log (notes);
+"""
+
+# The most notes strings to look up in one query, well under the limit
+# on the number of parameters older versions of SQLite allow.
+BATCH_SIZE = 500
+
+
+class SQLiteLog(MutableMapping):
+    """A mapping of timestamps to log entries, backed by a database.
+    Changes are made in a transaction, which is committed by save().
+    """
+
+    def __init__(self, path):
+        """Open (or create) the database for the given log path."""
+        self.path = self.get_path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(self.path)
+        self._db.executescript(SCHEMA)
+
+    @staticmethod
+    def get_path(path):
+        """Get the database path for the given log path."""
+        return path.with_name(f"{path.name}.db")
+
+    @classmethod
+    def exists(cls, path):
+        """Returns whether there is a database for the given log path."""
+        return cls.get_path(path).exists()
+
+    @staticmethod
+    def _seconds(key):
+        """Convert a key to the stored timestamp, or None if it can't be."""
+        try:
+            if key.microsecond:
+                return None
+            return LogEntry.timestamp_to_seconds(key)
+        except (AttributeError, TypeError):
+            return None
+
+    @staticmethod
+    def _entry(row):
+        """Convert a row to a log entry."""
+        timestamp, duration, notes = row
+        entry = LogEntry(LogEntry.timestamp_from_seconds(timestamp))
+        entry.set_duration_from_seconds(duration)
+        entry.set_notes(notes)
+        return entry
+
+    def __getitem__(self, key):
+        row = self._db.execute(
+            "SELECT timestamp, duration, notes FROM log WHERE timestamp = ?",
+            (self._seconds(key),),
+        ).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return self._entry(row)
+
+    def __contains__(self, key):
+        row = self._db.execute(
+            "SELECT 1 FROM log WHERE timestamp = ?", (self._seconds(key),)
+        ).fetchone()
+        return row is not None
+
+    def __setitem__(self, key, entry):
+        seconds = self._seconds(key)
+        if seconds is None:
+            logging.warning("Cannot store entry without a timestamp.")
+            return
+
+        self._db.execute(
+            "INSERT OR REPLACE INTO log VALUES (?, ?, ?)",
+            (seconds, entry.duration_as_seconds(), entry.notes),
+        )
+
+    def __delitem__(self, key):
+        cursor = self._db.execute(
+            "DELETE FROM log WHERE timestamp = ?", (self._seconds(key),)
+        )
+        if not cursor.rowcount:
+            raise KeyError(key)
+
+    def __iter__(self):
+        for (seconds,) in self._db.execute(
+            "SELECT timestamp FROM log ORDER BY timestamp"
+        ).fetchall():
+            yield LogEntry.timestamp_from_seconds(seconds)
+
+    def __len__(self):
+        return self._db.execute("SELECT COUNT(*) FROM log").fetchone()[0]
+
+    def values(self):
+        """Yield every entry, in order."""
+        cursor = self._db.execute(
+            "SELECT timestamp, duration, notes FROM log ORDER BY timestamp"
+        )
+        for row in cursor:
+            yield self._entry(row)
+
+    @staticmethod
+    def _range(start, end):
+        """Returns the conditions (to follow a WHERE clause) and parameters
+        for the timestamps from start (inclusive) to end (exclusive).
+        """
+        conditions = ""
+        parameters = []
+        if start is not None:
+            conditions += " AND timestamp >= ?"
+            parameters.append(LogEntry.timestamp_to_seconds(start))
+        if end is not None:
+            conditions += " AND timestamp < ?"
+            parameters.append(LogEntry.timestamp_to_seconds(end))
+        return conditions, parameters
+
+    def irange(self, start=None, end=None, reverse=False):
+        """Yield the entries from start (inclusive) to end (exclusive),
+        in order of timestamp.
+
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        reverse -- if True, yield the latest entries first
+        """
+        conditions, parameters = self._range(start, end)
+        query = "SELECT timestamp, duration, notes FROM log WHERE 1"
+        query += conditions
+        query += (
+            " ORDER BY timestamp DESC" if reverse else " ORDER BY timestamp"
+        )
+
+        for row in self._db.execute(query, parameters):
+            yield self._entry(row)
+
+    def search(self, query, start=None, end=None, reverse=False):
+        """Yield the entries with notes containing every word in the query,
+        matched as by NoteIndex, in order of timestamp.
+
+        query -- the words to search for
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        reverse -- if True, yield the latest entries first
+        """
+        words = NoteIndex.tokenize(query)
+        if not words:
+            return
+
+        # Only the distinct notes are read (from the notes index), and only
+        # the entries with matching notes are looked up (by the same index).
+        matches = [
+            notes
+            for (notes,) in self._db.execute("SELECT DISTINCT notes FROM log")
+            if all(
+                any(
+                    found.startswith(word)
+                    for found in NoteIndex.tokenize(notes)
+                )
+                for word in words
+            )
+        ]
+
+        conditions, parameters = self._range(start, end)
+        rows = []
+        for i in range(0, len(matches), BATCH_SIZE):
+            batch = matches[i : i + BATCH_SIZE]
+            rows += self._db.execute(
+                "SELECT timestamp, duration, notes FROM log WHERE notes IN "
+                f"({', '.join('?' * len(batch))}){conditions}",
+                batch + parameters,
+            ).fetchall()
+
+        rows.sort(reverse=reverse)
+        for row in rows:
+            yield self._entry(row)
+
+    def total(self, start=None, end=None):
+        """Returns the total seconds logged from start (inclusive) to end
+        (exclusive).
+
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        """
+        conditions, parameters = self._range(start, end)
+        return self._db.execute(
+            "SELECT COALESCE(SUM(duration), 0) FROM log "
+            f"WHERE 1{conditions}",
+            parameters,
+        ).fetchone()[0]
+
+    def activities(self, start=None, end=None):
+        """Returns a Counter of the total seconds logged for each activity
+        (that is, each distinct notes string) from start (inclusive) to end
+        (exclusive).
+
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        """
+        conditions, parameters = self._range(start, end)
+        return Counter(
+            dict(
+                self._db.execute(
+                    "SELECT notes, SUM(duration) FROM log "
+                    f"WHERE 1{conditions} GROUP BY notes",
+                    parameters,
+                )
+            )
+        )
+
+    def save(self):
+        """Commit the changes made since the last save."""
+        self._db.commit()
+
+    def vacuum(self):
+        """Reclaim the space left behind by removed entries."""
+        self._db.commit()
+        self._db.execute("VACUUM")
+
+    def close(self):
+        """Close the database, discarding any uncommitted changes."""
+        self._db.close()
+
+    def backup(self):
+        """Close the database, and keep it as a backup (with ".bak" added
+        to its name), such as once the log has been moved out of it.
+        """
+        self.close()
+        try:
+            self.path.replace(self.path.with_name(f"{self.path.name}.bak"))
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,231 @@
+"""Text Log [Timecard]
+Author(s): Jason C. McDonald
+
+Reads and writes the time log in its original, plain text format: one
+entry per line, with the timestamp, duration, and notes separated by pipes.
+"""
+
+import gc
+import io
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from itertools import repeat
+
+from timecard.data.compression import Compression
+from timecard.data.logentry import LogEntry
+
+
+class TextLog:
+    # The smallest chunk of a log worth parsing in a separate process.
+    MIN_CHUNK_SIZE = 1 << 22
+    # How much of a log to read and parse at once.
+    BLOCK_SIZE = 1 << 20
+
+    @classmethod
+    def read(cls, path):
+        """Read the entries from a text log file, a block at a time,
+        decompressing it as it's read if necessary.
+
+        Yields each entry in the file, in order.
+        """
+        with io.TextIOWrapper(Compression.open(path), encoding="utf-8") as file:
+            lineno = 0
+            while True:
+                # Read a block of complete lines.
+                block = file.read(cls.BLOCK_SIZE)
+                if not block:
+                    break
+                block += file.readline()
+
+                entries, invalid, lines = cls.parse(block)
+                for block_lineno, line in invalid:
+                    logging.warning(
+                        f"Invalid entry in {path}:{lineno + block_lineno}\n"
+                        f"  {line}"
+                    )
+                yield from entries
+                lineno += lines
+
+    @classmethod
+    def parse(cls, text):
+        """Parse the entries from the text of a log, which must consist
+        of complete lines (with newlines already translated to "\\n").
+
+        The fields of every line are split out at once, and then all the
+        numbers are converted together. If any line isn't in the usual form,
+        the lines are parsed one by one instead, so the results are always
+        the same as parsing each line with LogEntry.from_string().
+
+        Returns the entries, the (line number, line) of each invalid entry,
+        and the number of lines.
+        """
+        lines = text.split("\n")
+        # Only the final line of the log may be missing its newline.
+        if not lines[-1]:
+            lines.pop()
+        if not lines:
+            return [], [], 0
+
+        # None of the objects created here can form reference cycles, so
+        # don't let the garbage collector keep searching them for any.
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            return cls._parse_fields(text, lines)
+        finally:
+            if collecting:
+                gc.enable()
+
+    @classmethod
+    def _parse_fields(cls, text, lines):
+        """Parse the entries from the lines of a log, as for parse()."""
+        try:
+            fields = [line.strip().split("|", 3) for line in lines]
+            if set(map(len, fields)) != {3}:
+                raise ValueError("Invalid entry")
+            timestamps, durations, notes = zip(*fields)
+            if set(map(str.count, timestamps, repeat("-"))) != {5}:
+                raise ValueError("Invalid timestamp")
+            if set(map(str.count, durations, repeat(":"))) != {2}:
+                raise ValueError("Invalid duration")
+
+            numbers = cls._to_ints("-".join(timestamps).split("-"))
+            timestamps = map(datetime, *(numbers[i::6] for i in range(6)))
+            numbers = cls._to_ints(":".join(durations).split(":"))
+            durations = [
+                hours * 3600 + minutes * 60 + seconds
+                for hours, minutes, seconds in zip(
+                    *(numbers[i::3] for i in range(3))
+                )
+            ]
+            entries = list(map(LogEntry, timestamps, durations, notes))
+        except (OverflowError, ValueError):
+            entries = []
+            invalid = []
+            cls._parse_lines(text, 0, entries, invalid)
+            return entries, invalid, len(lines)
+
+        return entries, [], len(lines)
+
+    @staticmethod
+    def _to_ints(strings):
+        """Convert a list of strings to integers. The same few numbers
+        appear over and over in a log, so each is only converted once.
+        """
+        unique = set(strings)
+        return list(
+            map(dict(zip(unique, map(int, unique))).__getitem__, strings)
+        )
+
+    @staticmethod
+    def _parse_lines(text, lineno, entries, invalid):
+        """Parse the entries from the text of a log line by line, adding
+        them to entries, and any invalid lines to invalid.
+
+        Returns the line number of the last line.
+        """
+        lines = text.split("\n")
+        # Only the final line of the log may be missing its newline.
+        last = lines.pop()
+        lines = [f"{line}\n" for line in lines]
+        if last:
+            lines.append(last)
+
+        for line in lines:
+            lineno += 1
+            # Create a log entry from the data line.
+            entry = LogEntry.from_string(line)
+
+            # If we don't get three fields, skip the entry.
+            if entry is None:
+                invalid.append((lineno, line))
+                continue
+
+            entries.append(entry)
+        return lineno
+
+    @classmethod
+    def read_parallel(cls, path, workers=None):
+        """Read the entries from a text log file, splitting it into chunks
+        which are parsed in separate processes. The results (including any
+        warnings about invalid entries) are the same as for read().
+
+        path -- the path of the log file
+        workers -- the number of processes to use, or None for one per CPU
+
+        Yields each entry in the file, in order.
+        """
+        workers = workers or os.cpu_count() or 1
+
+        # Split the file into chunks at line boundaries, with a few chunks
+        # per process so that the processes finish at about the same time.
+        bounds = [0]
+        with path.open("rb") as file:
+            size = file.seek(0, 2)
+            chunk_size = max(cls.MIN_CHUNK_SIZE, size // (workers * 4))
+            position = chunk_size
+            while position < size:
+                file.seek(position - 1)
+                file.readline()
+                position = file.tell()
+                if position >= size:
+                    break
+                bounds.append(position)
+                position += chunk_size
+        bounds.append(size)
+
+        # Small files aren't worth the cost of starting the processes.
+        if len(bounds) <= 2 or workers == 1:
+            yield from cls.read(path)
+            return
+
+        chunks = len(bounds) - 1
+        with ProcessPoolExecutor(min(workers, chunks)) as pool:
+            results = pool.map(
+                cls._parse_chunk,
+                [path] * chunks,
+                bounds[:-1],
+                bounds[1:],
+            )
+
+            # Chunks come back in order, so the line numbers can be
+            # worked out as we go along.
+            lineno = 0
+            for entries, invalid, lines in results:
+                for chunk_lineno, line in invalid:
+                    logging.warning(
+                        f"Invalid entry in {path}:{lineno + chunk_lineno}\n"
+                        f"  {line}"
+                    )
+                yield from entries
+                lineno += lines
+
+    @staticmethod
+    def _parse_chunk(path, start, end):
+        """Parse the lines between two offsets in a text log file.
+        This runs in a separate process.
+
+        Returns the entries, the (line number, line) of each invalid entry
+        with line numbers relative to the chunk, and the number of lines.
+        """
+        with path.open("rb") as file:
+            file.seek(start)
+            data = file.read(end - start)
+
+        # Translate newlines the same way reading the file as text would.
+        text = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+        return TextLog.parse(text)
+
+    @staticmethod
+    def write(file, entries):
+        """Write entries to a file opened in binary mode.
+
+        Returns the number of entries written.
+        """
+        count = 0
+        for entry in entries:
+            file.write(f"{entry.as_string()}\n".encode("utf-8"))
+            count += 1
+        return count
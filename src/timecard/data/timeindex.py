@@ -0,0 +1,57 @@
+"""Time Index [Timecard]
+Author(s): Jason C. McDonald
+
+Keeps the timestamps of the log in sorted order, so entries within a range
+of time can be found by binary search instead of scanning the whole log.
+"""
+
+from bisect import bisect_left, insort
+
+
+class TimeIndex:
+    """A sorted collection of timestamps."""
+
+    def __init__(self, timestamps=()):
+        # Entries which couldn't be read may have no timestamp.
+        self._timestamps = sorted(t for t in timestamps if t is not None)
+
+    def __len__(self):
+        return len(self._timestamps)
+
+    def __contains__(self, timestamp):
+        i = self._position(timestamp)
+        return i < len(self._timestamps) and self._timestamps[i] == timestamp
+
+    def _position(self, timestamp):
+        """Returns where the timestamp is, or belongs, in the index."""
+        if timestamp is None:
+            return len(self._timestamps)
+        return bisect_left(self._timestamps, timestamp)
+
+    def add(self, timestamp):
+        """Add a timestamp to the index, if it isn't already there."""
+        if timestamp is not None and timestamp not in self:
+            insort(self._timestamps, timestamp)
+
+    def discard(self, timestamp):
+        """Remove a timestamp from the index, if it's there."""
+        if timestamp in self:
+            del self._timestamps[self._position(timestamp)]
+
+    def irange(self, start=None, end=None, reverse=False):
+        """Yield the timestamps from start (inclusive) to end (exclusive).
+
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        reverse -- if True, yield the latest timestamps first
+        """
+        low = 0 if start is None else bisect_left(self._timestamps, start)
+        high = (
+            len(self._timestamps)
+            if end is None
+            else bisect_left(self._timestamps, end)
+        )
+        positions = range(low, high)
+        if reverse:
+            positions = reversed(positions)
+        return (self._timestamps[i] for i in positions)
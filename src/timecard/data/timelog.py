@@ -2,15 +2,39 @@
 Author(s): Jason C. McDonald
 
 Manages access, storage, and file read/write for the time log.
-Also contains the class representing a single time log entry.
 """
 
 import functools
 import logging
-import os
-from datetime import datetime
+import shutil
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from itertools import islice
 
+from timecard.data.binarylog import BinaryLog
+from timecard.data.compression import Compression
+from timecard.data.entryids import EntryIds
+from timecard.data.entrystore import EntryStore
+from timecard.data.journal import Journal
+from timecard.data.lazylog import LazyLog
+from timecard.data.logcache import LogCache
+from timecard.data.logentry import LogEntry
+from timecard.data.logformat import LogFormat
+from timecard.data.noteindex import NoteIndex
+from timecard.data.rollups import Rollups
 from timecard.data.settings import Settings
+from timecard.data.shards import ShardedLog
+from timecard.data.sqlitelog import SQLiteLog
+from timecard.data.textlog import TextLog
+from timecard.data.timeindex import TimeIndex
+from timecard.data.writer import Writer
+
+# A change to the log: an entry added, removed, or updated. The operation
+# is one of Journal.ADD, Journal.REMOVE, or Journal.UPDATE; previous is
+# the entry as it was before the change, or None if it was added, and entry
+# is the entry as it is after the change, or None if it was removed.
+Change = namedtuple("Change", ("sequence", "operation", "previous", "entry"))
 
 
 def timelog_getter(func):
@@ -32,111 +56,75 @@ def timelog_setter(func):
     def wrapper(*args, **vargs):
         # Ensure log is loaded from file
         TimeLog.load()
+        start = len(TimeLog._pending)
         r = func(*args, **vargs)
-        # Immediately write the log to file
-        TimeLog.save()
+        # Immediately write the log to file, unless this is part of a
+        # transaction, which writes the log once it's finished.
+        if not TimeLog._transactions and len(TimeLog._pending) > start:
+            changes = TimeLog._pending[start:]
+            TimeLog.save()
+            TimeLog._publish(changes)
         return r
 
     return wrapper
 
 
-class LogEntry:
-    def __init__(self, timestamp=None, duration=(0, 0, 0), notes=""):
-        self.timestamp = timestamp
-        self.duration = duration
-        self.notes = notes
-
-    @staticmethod
-    def normalize_timestamp(timestamp):
-        """Normalizes the timestamp, throwing away milliseconds and
-        timezone data.
+class TimeLog:
+    _log = None
+    # Changes not yet written to file, as (operation, entry, previous)
+    # tuples, where previous is the entry replaced by an update.
+    _pending = []
+    # How many transactions are currently open.
+    _transactions = 0
+    # The inode, size, modification time, and last few bytes of the log
+    # file, as of when it was last loaded or saved.
+    _file = None
 
-        timestamp -- the timestamp to normalize
+    # Taken timestamps, each with a later timestamp which was free when
+    # add_to_log() last resolved a collision with it.
+    _skip = dict()
 
-        Returns the normalized timestamp.
-        """
-        return datetime(
-            timestamp.year,
-            timestamp.month,
-            timestamp.day,
-            timestamp.hour,
-            timestamp.minute,
-            timestamp.second,
-        )
+    # How many bytes at the end of the log file to remember.
+    TAIL_SIZE = 64
+    # The sorted timestamps in the log, once they're needed.
+    _index = None
+    # The words in the notes of the log, once they're needed.
+    _notes = None
+    # The totals for each day, week, and month, once they're needed.
+    _rollups = None
+    # The IDs given to entries so far.
+    _ids = EntryIds()
 
-    def set_timestamp(self, timestamp):
-        """Normalize and set the timestamp."""
-        self.timestamp = LogEntry.normalize_timestamp(timestamp)
+    # How many recent changes to keep for changes_since().
+    FEED_SIZE = 1000
+    # The number of the latest change to the log.
+    _sequence = 0
+    # The latest changes to the log, oldest first.
+    _feed = deque(maxlen=FEED_SIZE)
 
-    def set_timestamp_from_string(self, timestamp_str):
-        """Set the timestamp from dash-delimited string."""
-        try:
-            ts = [int(n) for n in timestamp_str.split("-")]
-            self.timestamp = datetime(*ts)
-        except (TypeError, ValueError):
-            return False
-        return True
+    callback_change = []
 
-    def set_duration(self, hours, minutes, seconds):
-        """Set duration from tuple.
+    @staticmethod
+    def increment_timestamp(timestamp):
+        """Returns the (normalized) timestamp one second later."""
+        return LogEntry.normalize_timestamp(timestamp) + timedelta(seconds=1)
 
-        hours -- the number of hours
-        minutes -- the number of minutes
-        seconds -- the number of seconds
+    @classmethod
+    def _free_timestamp(cls, timestamp):
+        """Returns the first timestamp at or after the given one which
+        isn't already in the log.
         """
-        self.duration = (hours, minutes, seconds)
-
-    def set_duration_from_string(self, duration_str):
-        """Set duration from colon-delimited string."""
-        try:
-            duration = [int(n) for n in duration_str.split(":")]
-            self.set_duration(*duration)
-        except (TypeError, ValueError):
-            return False
-        return True
-
-    def timestamp_as_string(self):
-        """Retrieve timestamp as dash-delimited string."""
-        return (
-            f"{self.timestamp.year}-{self.timestamp.month}-"
-            f"{self.timestamp.day}-{self.timestamp.hour}-"
-            f"{self.timestamp.minute}-{self.timestamp.second}"
-        )
-
-    def timestamp_as_format(self, format):
-        """Retrieve timestamp according to given format string."""
-        return self.timestamp.strftime(format)
-
-    def duration_as_string(self, as_decimal=False):
-        """Retrieve duration in format HH:MM:SS"""
-        if as_decimal:
-            decdur = self.duration[0] + (self.duration[1] / 60)
-            return f"{decdur:.2f}"
-        else:
-            return (
-                f"{self.duration[0]:02}:"
-                f"{self.duration[1]:02}:"
-                f"{self.duration[2]:02}"
+        # Every timestamp passed over is taken, so remember where the
+        # search ended, to skip straight there next time.
+        taken = []
+        while timestamp in cls._log:
+            taken.append(timestamp)
+            timestamp = cls._skip.get(timestamp) or cls.increment_timestamp(
+                timestamp
             )
-
-    def set_notes(self, notes):
-        """Retrive note string."""
-        self.notes = notes
-
-
-class TimeLog:
-    _log = None
-
-    @staticmethod
-    def increment_timestamp(timestamp):
-        return datetime(
-            timestamp.year,
-            timestamp.month,
-            timestamp.day,
-            timestamp.hour,
-            timestamp.minute,
-            timestamp.second + 1,
-        )
+        for passed in taken:
+            cls._skip[passed] = timestamp
+        return timestamp
 
     @classmethod
     def load(cls, force=False):
@@ -145,70 +133,442 @@ class TimeLog:
         # If we've already loaded, don't reload unless forced to.
         if not force and cls._log is not None:
             return
+        reloading = cls._log is not None
 
         # Retrieve the path from settings
         path = Settings.get_logpath()
 
         logging.debug(f"Loading time log from {path}")
 
-        # Initialize an empty log.
-        cls._log = dict()
-        # Attempt to open and parse the file.
+        # Don't read the log while it's being rewritten.
+        Writer.wait()
+        Journal.wait()
+
+        # Release the file behind the previous log, if any.
+        if isinstance(cls._log, (LazyLog, SQLiteLog)):
+            cls._log.close()
+
+        cls._pending = []
+        cls._index = None
+        cls._notes = None
+        cls._rollups = None
+        cls._skip = dict()
+        # The log in its old storage, if it needs to be moved.
+        previous = None
+
+        if Settings.get_backend() == "sqlite":
+            # Move an existing log file (or shards) into the database.
+            if not SQLiteLog.exists(path) and (
+                path.exists() or ShardedLog.exists(path)
+            ):
+                previous = ShardedLog(path)
+            cls._log = SQLiteLog(path)
+        else:
+            shardby = Settings.get_shardby()
+            if SQLiteLog.exists(path):
+                # The log used to be in a database, so move it back out.
+                previous = SQLiteLog(path)
+            elif shardby == "none" and ShardedLog.exists(path):
+                # The log used to be sharded, so gather it back together.
+                previous = ShardedLog(path)
+
+            if shardby != "none":
+                # Only the manifest is read; shards are loaded as needed.
+                cls._log = ShardedLog(path, shardby)
+            elif (
+                Settings.get_lazyload()
+                and previous is None
+                and Compression.for_path(path) is None
+            ):
+                # In lazy mode, only index the file; entries are read on demand.
+                # (Compressed files can't be read from just anywhere.)
+                cls._log = LazyLog(path)
+            else:
+                cls._load_eager(path)
+
+        if previous is not None:
+            for entry in previous.values():
+                cls._log[entry.timestamp] = entry
+
+        # Replay any changes journaled since the log was last written.
+        for operation, record in Journal.read():
+            if operation == Journal.UPDATE:
+                replaced, _, record = record.partition("|")
+            entry = LogEntry.from_string(record)
+            if entry is None:
+                continue
+            if operation == Journal.ADD:
+                cls._log[entry.timestamp] = entry
+            elif operation == Journal.REMOVE:
+                cls._log.pop(entry.timestamp, None)
+            else:
+                old = LogEntry()
+                if old.set_timestamp_from_string(replaced):
+                    cls._log.pop(old.timestamp, None)
+                cls._log[entry.timestamp] = entry
+
+        # Finish moving the log to its new storage right away.
+        if previous is not None:
+            cls._save_all()
+            # Keep the old storage, in case anything else still reads it,
+            # or the log needs to be recovered from it.
+            previous.backup()
+            logging.info("Kept the log's previous storage as a backup")
+            if not isinstance(cls._log, EntryStore):
+                # The log file is gone, so its cache is no use.
+                LogCache.remove(path)
+        elif isinstance(cls._log, ShardedLog) and cls._log.is_dirty():
+            cls.save()
+
+        if Journal.needs_compaction():
+            cls.compact()
+
+        # Entries which are still in the log keep their IDs.
+        cls._ids.retain(cls._log.__contains__)
+
+        cls._remember_file(path)
+
+        # Changes from before can't be caught up on; see changes_since().
+        cls._sequence += 1
+        cls._feed.clear()
+        if reloading:
+            cls.notify()
+
+    @classmethod
+    def _remember_file(cls, path):
+        """Note the state of the log file, so that changes made to it by
+        other programs can be noticed later.
+        """
         try:
-            with path.open("r", encoding="utf-8") as file:
-                # Process each line in the log file
-                for lineno, line in enumerate(file, start=1):
-                    # Each entry consists of three fields, separated by pipes
-                    entry_raw = line.strip().split("|", 3)
-
-                    # If we don't get three fields,
-                    # log a warning and skip the entry.
-                    if len(entry_raw) != 3:
-                        logging.warning(
-                            f"Invalid entry in {path}:{lineno}\n" f"  {line}"
-                        )
-                        continue
-
-                    # Create a log entry from the data line.
-                    entry = LogEntry()
-                    entry.set_timestamp_from_string(entry_raw[0])
-                    entry.set_duration_from_string(entry_raw[1])
-                    entry.set_notes(entry_raw[2])
-
-                    # Add entry to log, using timestamp as key.
-                    cls._log[entry.timestamp] = entry
-
-        # If no log file exists, move forward with the empty log (default).
+            stat = path.stat()
+            with path.open("rb") as file:
+                file.seek(max(stat.st_size - cls.TAIL_SIZE, 0))
+                tail = file.read(cls.TAIL_SIZE)
         except FileNotFoundError:
-            pass
+            cls._file = None
+            return
+        cls._file = (stat.st_ino, stat.st_size, stat.st_mtime_ns, tail)
+
+    @classmethod
+    def reload(cls):
+        """Pick up any changes made to the log file by another program.
+        If lines were only appended to a text log, just those lines are
+        read; otherwise, the whole log is loaded again. Changes made while
+        a write of our own is under way are left alone, since that write
+        replaces them anyway. Anything connected with connect() is told
+        about the changes.
+
+        Returns True if the log changed, or False otherwise.
+        """
+        if cls._log is None:
+            cls.load()
+            return True
+        if Writer.is_busy() or Journal.is_compacting():
+            return False
+
+        path = Settings.get_logpath()
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            if cls._file is None:
+                return False
+        else:
+            if cls._file is not None:
+                inode, size, mtime, tail = cls._file
+                if (stat.st_ino, stat.st_size, stat.st_mtime_ns) == (
+                    inode,
+                    size,
+                    mtime,
+                ):
+                    return False
+
+                # Appending to a file doesn't change its inode.
+                if (
+                    isinstance(cls._log, EntryStore)
+                    and stat.st_ino == inode
+                    and stat.st_size > size
+                ):
+                    count = cls._read_appended(path, size, tail)
+                    if count is not None:
+                        return count > 0
+
+        logging.debug(f"Log file {path} changed, reloading")
+        cls.load(force=True)
+        return True
+
+    @classmethod
+    def _read_appended(cls, path, size, tail):
+        """Read the lines appended to a text log file since it was the
+        given size, if the rest of the file hasn't changed.
+
+        size -- the size of the file when it was last read
+        tail -- the last few bytes of the file when it was last read
+
+        Returns the number of entries read, or None if the file has
+        changed in some other way.
+        """
+        # Only whole lines can be appended to, and only in uncompressed
+        # text logs.
+        if size and not tail.endswith(b"\n"):
+            return None
+        if Compression.detect(path) or BinaryLog.detect(path):
+            return None
+
+        with path.open("rb") as file:
+            # Make sure what was already read is still there.
+            file.seek(size - len(tail))
+            if file.read(len(tail)) != tail:
+                return None
+            data = file.read()
+
+        # Leave any partly-written final line until it's finished.
+        data = data[: data.rfind(b"\n") + 1]
+        try:
+            text = data.decode("utf-8")
+        except UnicodeDecodeError:
+            return None
+
+        logging.debug(f"Reading {len(data)} bytes appended to {path}")
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        entries, invalid, _ = TextLog.parse(text)
+        for lineno, line in invalid:
+            logging.warning(
+                f"Invalid entry appended to {path}, line {lineno}\n  {line}"
+            )
+        changes = []
+        for entry in entries:
+            # A later line for a timestamp replaces the earlier one.
+            previous = cls._log.get(entry.timestamp)
+            if previous is None:
+                cls._store(entry)
+                changes.append((Journal.ADD, entry, None))
+            else:
+                cls._update(previous, entry)
+                changes.append((Journal.UPDATE, entry, previous))
+
+        # Only remember what was read, so the rest is read once it's done.
+        stat = path.stat()
+        tail = (tail + data)[-cls.TAIL_SIZE :]
+        cls._file = (stat.st_ino, size + len(data), stat.st_mtime_ns, tail)
+        if changes:
+            cls._publish(changes)
+        return len(entries)
+
+    @classmethod
+    def _load_eager(cls, path):
+        """Load every entry from the log file into memory."""
+        # Attempt to open and parse the file, in whichever format it's in.
+        try:
+            # If the log hasn't changed since it was cached, read the cache.
+            if Settings.get_logcache():
+                key = LogCache.get_key(path)
+                cls._log = LogCache.read(path, key)
+                if cls._log is not None:
+                    return
+
+            cls._log = EntryStore(
+                LogFormat.read(path, Settings.get_parallelload())
+            )
+            if Settings.get_logcache():
+                LogCache.write(path, key, cls._log.columns())
+
+        # If no log file exists, move forward with an empty log (default).
+        except FileNotFoundError:
+            cls._log = EntryStore()
+
+        # If the log is damaged, keep whatever can be read. The log will be
+        # written over when it's next saved, so keep a copy of it as it is.
+        except Compression.ERRORS as e:
+            damaged = path.with_name(f"{path.name}.damaged")
+            shutil.copy2(path, damaged)
+            logging.error(
+                f"Could not read all of {path}: {e}\n"
+                f"  A copy of it was kept in {damaged}"
+            )
+            cls._log = EntryStore(LogFormat.salvage(path))
 
     @classmethod
     def save(cls):
-        """Save the time log to file."""
+        """Save the time log to file.
+        If the log is sharded, only the shards which changed are rewritten,
+        and if it's in a database, the changes are simply committed.
+        Otherwise, if journaling is enabled, only the changes since the
+        last save are appended to the journal. Otherwise, the whole log is
+        rewritten, in the background if possible; see flush().
+        """
+        if isinstance(cls._log, (ShardedLog, SQLiteLog)):
+            cls._save_all()
+        elif Settings.get_journal():
+            records = []
+            for operation, entry, previous in cls._pending:
+                record = entry.as_string()
+                if operation == Journal.UPDATE:
+                    record = f"{previous.timestamp_as_string()}|{record}"
+                records.append((operation, record))
+            Journal.append(records)
+            cls._pending = []
+            if Journal.needs_compaction():
+                cls.compact()
+        else:
+            cls._save_all(background=True)
+
+    @classmethod
+    def _save_all(cls, background=False):
+        """Rewrite the whole log file.
 
-        # Retrieve the save directory from settings
-        logdir = Settings.get_logdir()
-        # Create the save directory if necessary
-        if not logdir.exists():
-            os.makedirs(logdir)
+        background -- if True, write the file in the background, unless
+            there's a journal which must be cleared once it's written
+        """
+        # Don't write the log while it's being compacted.
+        Journal.wait()
 
         # Retrieve the full save path from settings
         logpath = Settings.get_logpath()
-        # Write the log out to the file.
-        with logpath.open("w", encoding="utf-8") as file:
-            for entry in cls._log.values():
-                file.write(
-                    (
-                        f"{entry.timestamp_as_string()}|"
-                        f"{entry.duration_as_string()}|"
-                        f"{entry.notes}\n"
-                    )
+
+        if (
+            background
+            and isinstance(cls._log, EntryStore)
+            and Journal.is_empty()
+        ):
+            columns = cls._log.columns()
+            entries = EntryStore.iter_columns(*columns)
+            writer = LogFormat.get_writer()
+            cache = Settings.get_logcache()
+
+            def on_written():
+                cls._remember_file(logpath)
+                if cache:
+                    LogCache.write(logpath, LogCache.get_key(logpath), columns)
+
+            Writer.submit(
+                logpath, lambda file: writer(file, entries), on_written
+            )
+            cls._pending = []
+            return
+
+        # Don't let an older write in the background replace this one.
+        Writer.wait()
+
+        if isinstance(cls._log, (ShardedLog, SQLiteLog)):
+            # These write out only what has changed.
+            cls._log.save()
+        elif isinstance(cls._log, LazyLog):
+            # The old file must be released before it can be replaced,
+            # and then the new file must be indexed in its place.
+            staging = logpath.with_name(f"{logpath.name}~")
+            logpath.parent.mkdir(parents=True, exist_ok=True)
+            with staging.open("wb") as file:
+                LogFormat.get_writer()(file, cls._log.values())
+            cls._log.close()
+            staging.replace(logpath)
+            cls._log = LazyLog(logpath)
+        else:
+            LogFormat.write(logpath, cls._log.values())
+            if Settings.get_logcache():
+                LogCache.write(
+                    logpath, LogCache.get_key(logpath), cls._log.columns()
                 )
 
+        # The log now contains everything the journal did.
+        Journal.clear()
+        cls._pending = []
+        cls._remember_file(logpath)
+
+    @classmethod
+    @timelog_getter
+    def compact(cls, wait=False):
+        """Rewrite the log file with the journal folded into it, in the
+        background. Any invalid or duplicate lines are dropped as well, and
+        the log is converted to the configured format if necessary.
+        See Journal.get_report() for the results.
+
+        Sharded logs have no journal, so every shard is simply rewritten
+        (right away) instead. Databases are vacuumed (also right away).
+
+        wait -- if True, block until the compaction is finished
+        """
+        if isinstance(cls._log, ShardedLog):
+            cls._log.rewrite()
+            return
+        if isinstance(cls._log, SQLiteLog):
+            cls._log.vacuum()
+            return
+
+        # Don't let a write in the background replace the compacted log.
+        Writer.wait()
+
+        writer = LogFormat.get_writer()
+        logpath = Settings.get_logpath()
+
+        if isinstance(cls._log, LazyLog):
+            # The old file is read from until the new one is written, and
+            # must then be released before it can be replaced, so this
+            # compaction can't run in the background.
+            log = cls._log
+            entries = log.snapshot()
+            replaced = []
+
+            def write_lazy(file):
+                count = writer(file, entries)
+                log.close()
+                return count
+
+            def on_replaced():
+                cls._remember_file(logpath)
+                replaced.append(logpath)
+
+            Journal.compact(write_lazy, True, on_replaced)
+            if replaced:
+                # Index the new file in place of the old one.
+                cls._log = LazyLog(logpath)
+            else:
+                # The old file is still there, as are the changes since.
+                log.reopen()
+            return
+
+        # The log may change while the compaction thread writes it out, so
+        # it's given a snapshot of the log as it is now. Taking one is quick,
+        # since the entries themselves are only created as they're written.
+        columns = None
+        if isinstance(cls._log, EntryStore):
+            columns = cls._log.columns()
+            entries = EntryStore.iter_columns(*columns)
+        else:
+            entries = list(cls._log.values())
+        cache = columns is not None and Settings.get_logcache()
+
+        def on_written():
+            # The new log file is our own, so it isn't a change to reload.
+            cls._remember_file(logpath)
+            if cache:
+                LogCache.write(logpath, LogCache.get_key(logpath), columns)
+
+        Journal.compact(lambda file: writer(file, entries), wait, on_written)
+
+    @classmethod
+    def flush(cls):
+        """Wait until every change to the log has been written to file.
+        This should be called before exiting.
+        """
+        Writer.wait()
+        Journal.wait()
+
+    @classmethod
+    @timelog_getter
+    def export_log(cls, path, logformat="text"):
+        """Write a copy of the log to another file.
+
+        path -- the path to write the copy to
+        logformat -- the format to write, either "text" or "binary"
+        """
+        LogFormat.write(path, cls._log.values(), logformat)
+
     @classmethod
     @timelog_getter
     def retrieve_log(cls):
-        """Returns the log as a list, loading it from file if necessary."""
+        """Returns the log as a list, loading it from file if necessary.
+        See iter_entries() for reading the log without copying it.
+        """
         return [entry for entry in cls._log.values()]
 
     @classmethod
@@ -224,6 +584,216 @@ class TimeLog:
             logging.warning("Cannot access entry at invalid timestamp.")
             return None
 
+    @classmethod
+    @timelog_getter
+    def get_entry_id(cls, timestamp):
+        """Returns the ID of the entry at a timestamp, or None if there is
+        no such entry. The entry keeps its ID until it's removed, even if
+        its timestamp is changed with update_entry().
+        """
+        if timestamp not in cls._ids and timestamp not in cls._log:
+            logging.warning("Cannot identify entry at invalid timestamp.")
+            return None
+        return cls._ids.get(timestamp)
+
+    @classmethod
+    @timelog_getter
+    def get_timestamp(cls, entry_id):
+        """Returns the timestamp of the entry with an ID, or None if there
+        is no such entry.
+        """
+        return cls._ids.timestamp(entry_id)
+
+    @classmethod
+    @timelog_getter
+    def retrieve_by_id(cls, entry_id):
+        """Returns the entry with an ID, or None if there is no such entry."""
+        timestamp = cls._ids.timestamp(entry_id)
+        if timestamp is None:
+            logging.warning("Cannot access entry with invalid ID.")
+            return None
+        return cls._log[timestamp]
+
+    @classmethod
+    def _irange(cls, start=None, end=None, reverse=False):
+        """Yield the entries from start (inclusive) to end (exclusive),
+        in order of timestamp.
+        """
+        # Entries are only ever at whole seconds, so round up any bounds
+        # which aren't, to keep entries before them out of the range.
+        if start is not None and start.microsecond:
+            start = LogEntry.normalize_timestamp(start) + timedelta(seconds=1)
+        if end is not None and end.microsecond:
+            end = LogEntry.normalize_timestamp(end) + timedelta(seconds=1)
+
+        if isinstance(cls._log, (EntryStore, LazyLog, ShardedLog, SQLiteLog)):
+            # These keep their own entries in order.
+            return cls._log.irange(start, end, reverse)
+
+        # The index is only built the first time it's needed, and then
+        # kept up to date as entries are added and removed.
+        if cls._index is None:
+            cls._index = TimeIndex(cls._log)
+        return (cls._log[t] for t in cls._index.irange(start, end, reverse))
+
+    @classmethod
+    @timelog_getter
+    def iter_entries(
+        cls,
+        start=None,
+        end=None,
+        reverse=False,
+        search=None,
+        where=None,
+        limit=None,
+    ):
+        """Yield entries from the log, in order of timestamp, without
+        copying the log. The log shouldn't be changed until it's done.
+
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        reverse -- if True, yield the latest entries first
+        search -- if given, only yield entries with notes containing every
+            word in it, as for search()
+        where -- if given, only yield entries for which where(entry) is true
+        limit -- the maximum number of entries to yield, or None for no limit
+        """
+        if search is None:
+            entries = cls._irange(start, end, reverse)
+        elif isinstance(cls._log, SQLiteLog):
+            # The database can search the notes itself.
+            entries = cls._log.search(search, start, end, reverse)
+        else:
+            # The index is only built the first time it's needed, and then
+            # kept up to date as entries are added and removed.
+            if cls._notes is None:
+                cls._notes = NoteIndex(cls._log.values())
+            entries = (
+                cls._log[t]
+                for t in sorted(cls._notes.search(search), reverse=reverse)
+                if (start is None or t >= start) and (end is None or t < end)
+            )
+
+        if where is not None:
+            entries = filter(where, entries)
+        if limit is not None:
+            entries = islice(entries, max(limit, 0))
+        yield from entries
+
+    @classmethod
+    @timelog_getter
+    def count(cls):
+        """Returns the number of entries in the log, without reading them."""
+        return len(cls._log)
+
+    @classmethod
+    @timelog_getter
+    def query_range(cls, start=None, end=None):
+        """Returns the entries from start up to (but not including) end,
+        as a list in order of timestamp.
+
+        start -- the earliest timestamp, or None for no limit
+        end -- the timestamp to stop before, or None for no limit
+        """
+        return list(cls.iter_entries(start, end))
+
+    @classmethod
+    @timelog_getter
+    def query_latest(cls, count):
+        """Returns the latest entries as a list, newest first.
+
+        count -- the maximum number of entries to return
+        """
+        return list(cls.iter_entries(reverse=True, limit=count))
+
+    @classmethod
+    @timelog_getter
+    def query_day(cls, day):
+        """Returns the entries on a day as a list, in order of timestamp.
+
+        day -- the day as a date (or datetime) object
+        """
+        start = datetime(day.year, day.month, day.day)
+        return list(cls.iter_entries(start, start + timedelta(days=1)))
+
+    @classmethod
+    @timelog_getter
+    def search(cls, query):
+        """Returns the entries with notes containing every word in the
+        query, as a list in order of timestamp. Words are matched without
+        regard to case, and as prefixes, so "acme proj" would find an entry
+        with the notes "Project planning for ACME Corp."
+
+        query -- the words to search for
+        """
+        return list(cls.iter_entries(search=query))
+
+    @classmethod
+    def _get_rollups(cls):
+        """Returns the totals for the log, working them out the first time
+        they're needed. After that, they're kept up to date as entries are
+        added, removed, and updated.
+        """
+        if cls._rollups is None:
+            if isinstance(cls._log, EntryStore):
+                # Total up the columns, without creating every entry.
+                cls._rollups = Rollups.from_columns(*cls._log.columns())
+            else:
+                cls._rollups = Rollups(cls._log.values())
+        return cls._rollups
+
+    @staticmethod
+    def _midnight(day):
+        """Returns the start of a day, as a datetime object."""
+        return datetime(day.year, day.month, day.day)
+
+    @classmethod
+    @timelog_getter
+    def get_total(cls, period, day=None):
+        """Returns the total seconds logged in a day, week, or month,
+        without reading through the log.
+
+        period -- one of Rollups.DAY, Rollups.WEEK (an ISO week, starting
+            on Monday), or Rollups.MONTH
+        day -- any day in the period as a date (or datetime) object,
+            or None for today
+        """
+        if day is None:
+            day = datetime.now()
+        if isinstance(cls._log, SQLiteLog):
+            # The database can total up the period itself.
+            start, end = Rollups.bounds(period, day)
+            return cls._log.total(cls._midnight(start), cls._midnight(end))
+        return cls._get_rollups().total(period, day)
+
+    @classmethod
+    @timelog_getter
+    def get_total_range(cls, start, end):
+        """Returns the total seconds logged from the day start up to (but
+        not including) the day end, without reading through the log.
+        """
+        if isinstance(cls._log, SQLiteLog):
+            return cls._log.total(cls._midnight(start), cls._midnight(end))
+        return cls._get_rollups().total_range(start, end)
+
+    @classmethod
+    @timelog_getter
+    def get_activity_totals(cls, period, day=None):
+        """Returns the total seconds logged for each activity (that is, each
+        distinct notes string) in a day, week, or month, as a Counter, so
+        most_common() gives the top activities.
+
+        period -- one of Rollups.DAY, Rollups.WEEK, or Rollups.MONTH
+        day -- any day in the period as a date (or datetime) object,
+            or None for today
+        """
+        if day is None:
+            day = datetime.now()
+        if isinstance(cls._log, SQLiteLog):
+            start, end = Rollups.bounds(period, day)
+            return cls._log.activities(cls._midnight(start), cls._midnight(end))
+        return cls._get_rollups().activities(period, day)
+
     @classmethod
     @timelog_setter
     def add_to_log(cls, timestamp, hours, minutes, seconds, notes):
@@ -240,11 +810,8 @@ class TimeLog:
 
         Returns the timestamp the entry is stored under.
         """
-        timestamp = LogEntry.normalize_timestamp(timestamp)
-        # If/While the timestamp is already in the log...
-        while timestamp in cls._log:
-            # Resolve collision by incrementing it by one second.
-            timestamp = cls.increment_timestamp(timestamp)
+        # Resolve any collision by moving to the next free second.
+        timestamp = cls._free_timestamp(LogEntry.normalize_timestamp(timestamp))
 
         # Create the new entry.
         entry = LogEntry()
@@ -253,7 +820,8 @@ class TimeLog:
         entry.set_notes(notes)
 
         # Add the new entry to the log.
-        cls._log[timestamp] = entry
+        cls._store(entry)
+        cls._pending.append((Journal.ADD, entry, None))
 
         return timestamp
 
@@ -264,7 +832,223 @@ class TimeLog:
 
         timestamp -- the index of the item to remove
         """
+        entry = cls._unstore(timestamp)
+        if entry is None:
+            logging.warning("Cannot delete entry at invalid timestamp.")
+        else:
+            cls._pending.append((Journal.REMOVE, entry, None))
+
+    @classmethod
+    @timelog_setter
+    def update_entry(cls, entry_id, timestamp=None, duration=None, notes=None):
+        """Change an entry in the log. Only the given fields are changed,
+        the entry keeps its ID, and the log is written as for a single
+        change. If the timestamp is changed to one already in the log,
+        the collision is resolved as for add_to_log().
+
+        entry_id -- the ID of the entry to change
+        timestamp -- the new timestamp as a datetime object
+        duration -- the new duration as an (hours, minutes, seconds) tuple
+        notes -- the new activity description string
+
+        Returns the timestamp the entry is now stored under, or None if
+        there was no entry with the ID.
+        """
+        previous = cls._ids.timestamp(entry_id)
+        if previous is None:
+            logging.warning("Cannot update entry with invalid ID.")
+            return None
+
+        # The entry in the log is left as it is, and replaced.
+        old = cls._log[previous]
+        entry = LogEntry(old.timestamp, old.seconds, old.notes)
+        if timestamp is not None:
+            entry.set_timestamp(timestamp)
+        if duration is not None:
+            entry.set_duration(*duration)
+        if notes is not None:
+            entry.set_notes(notes)
+
+        cls._update(old, entry)
+        cls._pending.append((Journal.UPDATE, entry, old))
+        return entry.timestamp
+
+    @classmethod
+    def add_many(cls, entries):
+        """Add several entries to the log, writing the log only once.
+
+        entries -- an iterable of (timestamp, hours, minutes, seconds, notes)
+            tuples, as for add_to_log()
+
+        Returns a list of the timestamps the entries are stored under.
+        """
+        with cls.transaction():
+            return [cls.add_to_log(*entry) for entry in entries]
+
+    @classmethod
+    def remove_many(cls, timestamps):
+        """Remove several entries from the log, writing the log only once.
+
+        timestamps -- an iterable of the timestamps of the entries to remove
+        """
+        with cls.transaction():
+            for timestamp in timestamps:
+                cls.remove_from_log(timestamp)
+
+    @classmethod
+    @contextmanager
+    def transaction(cls):
+        """Group changes to the log, so the log is only written once, when
+        the with block is finished. If the block raises an exception, all
+        the changes made in it are undone instead, and nothing is written.
+        Transactions can be nested; the log is written when the outermost
+        one is finished.
+
+        with TimeLog.transaction():
+            TimeLog.remove_from_log(old_timestamp)
+            TimeLog.add_to_log(new_timestamp, 1, 30, 0, "Notes")
+        """
+        cls.load()
+        start = len(cls._pending)
+        cls._transactions += 1
         try:
-            del cls._log[timestamp]
+            yield
+        except BaseException:
+            cls._rollback(start)
+            raise
+        finally:
+            cls._transactions -= 1
+
+        if not cls._transactions and len(cls._pending) > start:
+            changes = cls._pending[start:]
+            cls.save()
+            cls._publish(changes)
+
+    @classmethod
+    def _rollback(cls, start):
+        """Undo the changes made since there were start pending changes."""
+        changes = cls._pending[start:]
+        del cls._pending[start:]
+        for operation, entry, previous in reversed(changes):
+            if operation == Journal.ADD:
+                cls._unstore(entry.timestamp)
+            elif operation == Journal.REMOVE:
+                cls._store(entry)
+            else:
+                cls._update(entry, previous)
+
+    @classmethod
+    def _store(cls, entry):
+        """Put an entry in the log, and in any indexes."""
+        cls._log[entry.timestamp] = entry
+        if cls._index is not None:
+            cls._index.add(entry.timestamp)
+        if cls._notes is not None:
+            cls._notes.add(entry)
+        if cls._rollups is not None:
+            cls._rollups.add(entry)
+
+    @classmethod
+    def _unstore(cls, timestamp):
+        """Take an entry out of the log, and out of any indexes.
+
+        Returns the entry, or None if there was no entry at the timestamp.
+        """
+        try:
+            entry = cls._log.pop(timestamp)
         except KeyError:
-            logging.warning("Cannot delete entry at invalid timestamp.")
+            return None
+        if cls._index is not None:
+            cls._index.discard(timestamp)
+        if cls._notes is not None:
+            cls._notes.discard(entry)
+        if cls._rollups is not None:
+            cls._rollups.discard(entry)
+        cls._ids.discard(timestamp)
+        # Collisions may now be resolved sooner.
+        cls._skip.clear()
+        return entry
+
+    @classmethod
+    def _update(cls, old, entry):
+        """Replace an entry in the log, and in any indexes, with a changed
+        copy of it, which keeps its ID. If the timestamp was changed, any
+        collision is resolved, and entry is given the timestamp used.
+        """
+        if entry.timestamp == old.timestamp:
+            # Only the entry itself needs replacing.
+            cls._log[entry.timestamp] = entry
+            if cls._notes is not None and entry.notes != old.notes:
+                cls._notes.discard(old)
+                cls._notes.add(entry)
+            if cls._rollups is not None:
+                cls._rollups.discard(old)
+                cls._rollups.add(entry)
+            return
+
+        entry_id = cls._ids.get(old.timestamp)
+        cls._unstore(old.timestamp)
+        # The old timestamp is free now, so the entry can move into it.
+        entry.timestamp = cls._free_timestamp(entry.timestamp)
+        cls._store(entry)
+        cls._ids.bind(entry_id, entry.timestamp)
+
+    @classmethod
+    def _publish(cls, changes):
+        """Number the given changes and add them to the change feed, then
+        let everything know the log has changed.
+
+        changes -- a list of (operation, entry, previous) tuples, as in
+            _pending
+        """
+        for operation, entry, previous in changes:
+            cls._sequence += 1
+            if operation == Journal.REMOVE:
+                previous, entry = entry, None
+            cls._feed.append(Change(cls._sequence, operation, previous, entry))
+        cls.notify()
+
+    @classmethod
+    def get_sequence(cls):
+        """Returns the number of the latest change to the log. Changes are
+        numbered in the order they're made, and pass this number to
+        changes_since() to find out what changed after now.
+        """
+        return cls._sequence
+
+    @classmethod
+    def changes_since(cls, sequence):
+        """Returns the changes made to the log after the change with the
+        given number, as a list of Change tuples, oldest first.
+
+        If the changes are no longer all known, because there were too
+        many of them, or because the log was loaded again, returns None
+        instead. The whole log must then be read again.
+        """
+        missed = cls._sequence - sequence
+        if missed < 0 or missed > len(cls._feed):
+            return None
+        return list(islice(cls._feed, len(cls._feed) - missed, None))
+
+    @classmethod
+    def notify(cls):
+        """Let everything know the log has changed."""
+        for callback in cls.callback_change:
+            callback()
+
+    @classmethod
+    def connect(cls, on_change=None):
+        """Connect signal. The callback is called after each change to
+        the log is saved, or once for a whole transaction, and when the log
+        is loaded again. See changes_since() for what changed.
+        """
+        if on_change and on_change not in cls.callback_change:
+            cls.callback_change.append(on_change)
+
+    @classmethod
+    def disconnect(cls, on_change=None):
+        """Disconnect callback from signal. (Idempotent)."""
+        try:
+            cls.callback_change.remove(on_change)
+        except ValueError:
+            pass
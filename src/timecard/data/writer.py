@@ -0,0 +1,113 @@
+"""Writer [Timecard]
+Author(s): Jason C. McDonald
+
+Writes the time log to file in the background, so the interface doesn't
+have to wait for the disk. If the log is saved again before an earlier save
+has been written, only the latest version is written.
+"""
+
+import logging
+import os
+import threading
+import time
+
+
+class Writer:
+    # How long to wait for more saves before writing, in seconds.
+    COALESCE_DELAY = 0.2
+
+    # Guards the state below, which the writer thread shares.
+    _condition = threading.Condition()
+    # The background writer thread, if any.
+    _thread = None
+    # The latest (path, write, on_written) waiting to be written, if any.
+    _request = None
+    # Whether a request is being written right now.
+    _writing = False
+
+    @classmethod
+    def submit(cls, path, write, on_written=None):
+        """Write a file in the background, replacing any earlier request
+        for the same file which hasn't been started yet.
+
+        path -- the path of the file to write
+        write -- a function which writes the complete file to the given
+            binary file object. This will be called from the writer
+            thread, so it must not rely on anything that can change in
+            the meantime.
+        on_written -- a function to call (from the writer thread) once
+            the file has been written
+        """
+        with cls._condition:
+            if cls._request is not None and cls._request[0] != path:
+                # Don't drop a write to a different file.
+                cls._write(*cls._request)
+            cls._request = (path, write, on_written)
+            if cls._thread is None or not cls._thread.is_alive():
+                cls._thread = threading.Thread(
+                    target=cls._run, name="timecard-writer"
+                )
+                cls._thread.start()
+
+    @classmethod
+    def _run(cls):
+        """Write each request in turn, until there are none left."""
+        while True:
+            # Give a burst of saves a moment to finish.
+            time.sleep(cls.COALESCE_DELAY)
+            with cls._condition:
+                if cls._request is None:
+                    cls._thread = None
+                    cls._condition.notify_all()
+                    return
+                request = cls._request
+                cls._request = None
+                cls._writing = True
+
+            try:
+                cls._write(*request)
+            finally:
+                with cls._condition:
+                    cls._writing = False
+                    cls._condition.notify_all()
+
+    @staticmethod
+    def _write(path, write, on_written=None):
+        """Write a file via a staging file, which is synced to disk and
+        then moved into place atomically.
+        """
+        staging = path.with_name(f"{path.name}~")
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with staging.open("wb") as file:
+                write(file)
+                file.flush()
+                os.fsync(file.fileno())
+            staging.replace(path)
+        except OSError as e:
+            logging.error(f"Could not write {path}: {e}")
+            staging.unlink(missing_ok=True)
+            return
+
+        if on_written is not None:
+            on_written()
+
+    @classmethod
+    def is_busy(cls):
+        """Returns whether there is anything waiting to be written."""
+        with cls._condition:
+            return cls._request is not None or cls._writing
+
+    @classmethod
+    def wait(cls):
+        """Write anything waiting to be written right away, and wait for
+        any write already under way to finish.
+        """
+        with cls._condition:
+            while cls._request is not None or cls._writing:
+                if cls._writing:
+                    cls._condition.wait()
+                    continue
+                # Don't make the caller wait out the delay as well.
+                cls._write(*cls._request)
+                cls._request = None
@@ -14,6 +14,7 @@ from timecard.interface.workspace import Workspace
 class AppControls:
     widget = QWidget()
     layout = QHBoxLayout()
+    btn_dashboard = QPushButton()
     btn_settings = QPushButton()
     btn_about = QPushButton()
     btn_help = QPushButton()
@@ -23,6 +24,7 @@ class AppControls:
     def build(cls):
         """Construct the interface."""
         cls.widget.setLayout(cls.layout)
+        cls.layout.addWidget(cls.btn_dashboard)
         cls.layout.addWidget(cls.btn_settings)
         cls.layout.addWidget(cls.btn_about)
         cls.layout.addWidget(cls.btn_help)
@@ -39,6 +41,11 @@ class AppControls:
         """Disconnect signals from the control buttons.
         This must be done before new signals can be added properly.
         """
+        try:
+            cls.btn_dashboard.clicked.disconnect()
+        except RuntimeError:
+            pass
+
         try:
             cls.btn_settings.clicked.disconnect()
         except RuntimeError:
@@ -64,6 +71,13 @@ class AppControls:
         """Set buttons to those for Log (default) mode."""
         cls._disconnect_buttons()
 
+        cls.btn_dashboard.setText("Summary")
+        cls.btn_dashboard.setIcon(QIcon.fromTheme("x-office-spreadsheet"))
+        cls.btn_dashboard.setWhatsThis(
+            "View totals for today, this week, and this month."
+        )
+        cls.btn_dashboard.clicked.connect(cls.dashboard)
+
         cls.btn_settings.setText("Settings")
         cls.btn_settings.setIcon(QIcon.fromTheme("preferences-system"))
         cls.btn_settings.setWhatsThis("View and edit settings.")
@@ -89,6 +103,13 @@ class AppControls:
         """Set buttons to those for Settings mode."""
         cls._disconnect_buttons()
 
+        cls.btn_dashboard.setText("Summary")
+        cls.btn_dashboard.setIcon(QIcon.fromTheme("x-office-spreadsheet"))
+        cls.btn_dashboard.setWhatsThis(
+            "View totals for today, this week, and this month."
+        )
+        cls.btn_dashboard.clicked.connect(cls.dashboard)
+
         cls.btn_settings.setText("Log")
         cls.btn_settings.setIcon(QIcon.fromTheme("go-home"))
         cls.btn_settings.setWhatsThis("Return to time log.")
@@ -114,6 +135,13 @@ class AppControls:
         """Set buttons to those for About mode."""
         cls._disconnect_buttons()
 
+        cls.btn_dashboard.setText("Summary")
+        cls.btn_dashboard.setIcon(QIcon.fromTheme("x-office-spreadsheet"))
+        cls.btn_dashboard.setWhatsThis(
+            "View totals for today, this week, and this month."
+        )
+        cls.btn_dashboard.clicked.connect(cls.dashboard)
+
         cls.btn_settings.setText("Settings")
         cls.btn_settings.setIcon(QIcon.fromTheme("preferences-system"))
         cls.btn_settings.setWhatsThis("View and edit settings.")
@@ -139,6 +167,13 @@ class AppControls:
         """Set buttons to those for Quit Prompt mode."""
         cls._disconnect_buttons()
 
+        cls.btn_dashboard.setText("Summary")
+        cls.btn_dashboard.setIcon(QIcon.fromTheme("x-office-spreadsheet"))
+        cls.btn_dashboard.setWhatsThis(
+            "View totals for today, this week, and this month."
+        )
+        cls.btn_dashboard.clicked.connect(cls.dashboard)
+
         cls.btn_settings.setText("Settings")
         cls.btn_settings.setIcon(QIcon.fromTheme("preferences-system"))
         cls.btn_settings.setWhatsThis("View and edit settings.")
@@ -159,11 +194,46 @@ class AppControls:
         cls.btn_quit.setWhatsThis("Return to time log.")
         cls.btn_quit.clicked.connect(cls.default)
 
+    @classmethod
+    def _set_mode_dashboard(cls):
+        """Set buttons to those for Dashboard mode."""
+        cls._disconnect_buttons()
+
+        cls.btn_dashboard.setText("Log")
+        cls.btn_dashboard.setIcon(QIcon.fromTheme("go-home"))
+        cls.btn_dashboard.setWhatsThis("Return to time log.")
+        cls.btn_dashboard.clicked.connect(cls.default)
+
+        cls.btn_settings.setText("Settings")
+        cls.btn_settings.setIcon(QIcon.fromTheme("preferences-system"))
+        cls.btn_settings.setWhatsThis("View and edit settings.")
+        cls.btn_settings.clicked.connect(cls.settings)
+
+        cls.btn_about.setText("About")
+        cls.btn_about.setIcon(QIcon.fromTheme("help-about"))
+        cls.btn_about.setWhatsThis("View Timecard credits and license.")
+        cls.btn_about.clicked.connect(cls.about)
+
+        cls.btn_help.setText("Help")
+        cls.btn_help.setIcon(QIcon.fromTheme("help-contents"))
+        cls.btn_help.setWhatsThis("Display help for a clicked item.")
+        cls.btn_help.clicked.connect(cls.help)
+
+        cls.btn_quit.setText("Quit")
+        cls.btn_quit.setIcon(QIcon.fromTheme("application-exit"))
+        cls.btn_quit.setWhatsThis("Quit Timecard.")
+        cls.btn_quit.clicked.connect(cls.quit)
+
     @classmethod
     def default(cls):
         cls._set_mode_default()
         Workspace.set_mode_timelog()
 
+    @classmethod
+    def dashboard(cls):
+        cls._set_mode_dashboard()
+        Workspace.set_mode_dashboard()
+
     @classmethod
     def about(cls):
         cls._set_mode_about()
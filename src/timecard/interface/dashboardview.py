@@ -0,0 +1,100 @@
+"""Dashboard View [Timecard]
+Author(s): Jason C. McDonald
+
+Summarizes the time logged today, this week, and this month, and the
+activities the most time went to this month. Everything shown comes from
+the totals TimeLog keeps, so the log is never read through to show it.
+"""
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QGridLayout,
+    QLabel,
+    QTreeWidget,
+    QTreeWidgetItem,
+    QWidget,
+)
+
+from timecard.data.logentry import LogEntry
+from timecard.data.rollups import Rollups
+from timecard.data.settings import Settings
+from timecard.data.timelog import TimeLog
+
+
+class DashboardView:
+    widget = QWidget()
+    layout = QGridLayout()
+
+    lbl_today = QLabel("Today")
+    lbl_today_total = QLabel()
+    lbl_week = QLabel("This Week")
+    lbl_week_total = QLabel()
+    lbl_month = QLabel("This Month")
+    lbl_month_total = QLabel()
+
+    lbl_top = QLabel("Top Activities This Month")
+    tree_top = QTreeWidget()
+
+    # How many activities to list.
+    TOP_COUNT = 10
+
+    @classmethod
+    def build(cls):
+        """Build the interface."""
+        totals = (
+            (cls.lbl_today, cls.lbl_today_total, "today"),
+            (cls.lbl_week, cls.lbl_week_total, "this week (from Monday)"),
+            (cls.lbl_month, cls.lbl_month_total, "this month"),
+        )
+        for row, (label, total, period) in enumerate(totals):
+            total.setWhatsThis(f"The total time logged {period}.")
+            total.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+            cls.layout.addWidget(label, row, 0, 1, 1)
+            cls.layout.addWidget(total, row, 1, 1, 1)
+
+        cls.tree_top.setWhatsThis(
+            "The activities the most time was logged for this month."
+        )
+        cls.tree_top.setHeaderLabels(["Activity", "Duration"])
+        cls.tree_top.setRootIsDecorated(False)
+        cls.layout.addWidget(cls.lbl_top, 3, 0, 1, 2)
+        cls.layout.addWidget(cls.tree_top, 4, 0, 1, 2)
+
+        # Keep up with changes to the log while the dashboard is showing.
+        TimeLog.connect(on_change=cls.changed)
+
+        cls.widget.setLayout(cls.layout)
+        return cls.widget
+
+    @staticmethod
+    def _format(seconds):
+        """Format a number of seconds as a duration, as in the log."""
+        return LogEntry(duration=seconds).duration_as_string(
+            Settings.get_decdur()
+        )
+
+    @classmethod
+    def refresh(cls):
+        """Show the latest totals."""
+        cls.lbl_today_total.setText(cls._format(TimeLog.get_total(Rollups.DAY)))
+        cls.lbl_week_total.setText(cls._format(TimeLog.get_total(Rollups.WEEK)))
+        cls.lbl_month_total.setText(
+            cls._format(TimeLog.get_total(Rollups.MONTH))
+        )
+
+        cls.tree_top.clear()
+        activities = TimeLog.get_activity_totals(Rollups.MONTH)
+        for notes, seconds in activities.most_common(cls.TOP_COUNT):
+            if seconds <= 0:
+                break
+            item = QTreeWidgetItem([notes, cls._format(seconds)])
+            item.setToolTip(0, notes)
+            cls.tree_top.addTopLevelItem(item)
+
+    @classmethod
+    def changed(cls):
+        """Show the latest totals, if the dashboard is showing; otherwise,
+        they're shown when it's next opened.
+        """
+        if cls.widget.isVisible():
+            cls.refresh()
@@ -131,8 +131,9 @@ class EditView:
             callback()
 
     @classmethod
-    def load_item(cls, timestamp):
-        cls.entry = TimeLog.retrieve_from_log(timestamp)
+    def load_item(cls, entry_id):
+        cls.index = entry_id
+        cls.entry = TimeLog.retrieve_by_id(entry_id)
         cls.refresh()
 
     @classmethod
@@ -214,7 +215,6 @@ class EditView:
 
     @classmethod
     def save(cls):
-        TimeLog.remove_from_log(cls.entry.timestamp)
         timestamp = datetime(
             cls.cal_timestamp.date().year(),
             cls.cal_timestamp.date().month(),
@@ -223,15 +223,19 @@ class EditView:
             cls.cal_timestamp.time().minute(),
             cls.cal_timestamp.time().second(),
         )
-        new_timestamp = TimeLog.add_to_log(
-            timestamp,
-            cls.spn_hour.value(),
-            cls.spn_min.value(),
-            cls.spn_sec.value(),
-            cls.txt_activity.text(),
+        # The entry keeps its ID, so it can still be found.
+        TimeLog.update_entry(
+            cls.index,
+            timestamp=timestamp,
+            duration=(
+                cls.spn_hour.value(),
+                cls.spn_min.value(),
+                cls.spn_sec.value(),
+            ),
+            notes=cls.txt_activity.text(),
         )
         cls.not_edited()
 
-        cls.entry = TimeLog.retrieve_from_log(new_timestamp)
+        cls.entry = TimeLog.retrieve_by_id(cls.index)
         # Display the revised data.
         cls.refresh()
@@ -7,6 +7,7 @@ initially called to build and run the interface.
 
 from timecard.interface.app import App  # isort: skip <- this must come first!
 from timecard.data.backup import Backup
+from timecard.data.timelog import TimeLog
 from timecard.interface.appcontrols import AppControls
 from timecard.interface.focus import Focus
 from timecard.interface.notes import Notes
@@ -15,6 +16,7 @@ from timecard.interface.timecontrols import TimeControls
 from timecard.interface.timedisplay import TimeDisplay
 from timecard.interface.workspace import Workspace
 from timecard.logic.clock import Clock
+from timecard.logic.logwatcher import LogWatcher
 
 
 def build():
@@ -39,8 +41,14 @@ def build():
     # Start the clock!
     Clock.start()
 
+    # Pick up changes made to the log by other programs.
+    LogWatcher.start()
+
 
 def run():
     """Run the interface."""
     build()
-    return App.run()
+    result = App.run()
+    # Make sure every change to the log is on disk before exiting.
+    TimeLog.flush()
+    return result
@@ -23,6 +23,8 @@ from timecard.data.timelog import TimeLog
 class LogViewEntry(QTreeWidgetItem):
     def __init__(self, entry, *args, **kwargs):
         self.entry = entry
+        # The entry keeps its ID even if its timestamp is edited.
+        self.entry_id = TimeLog.get_entry_id(entry.timestamp)
         super().__init__(*args, **kwargs)
 
         self.setText(0, self.entry.timestamp_as_format(Settings.get_datefmt()))
@@ -35,6 +37,9 @@ class LogViewEntry(QTreeWidgetItem):
     def get_timestamp(self):
         return self.entry.timestamp
 
+    def get_entry_id(self):
+        return self.entry_id
+
 
 class LogView:
     widget = QWidget()
@@ -46,6 +51,11 @@ class LogView:
 
     edit_callback = []
 
+    # The item for each entry shown, by timestamp.
+    items = dict()
+    # The number of the latest change to the log which is shown.
+    sequence = 0
+
     @classmethod
     def build(cls):
         """Build the interface"""
@@ -61,6 +71,8 @@ class LogView:
         cls._set_mode_default()
 
         cls.tree_log.itemClicked.connect(cls.selected)
+        # Show changes to the log as soon as they're made.
+        TimeLog.connect(on_change=cls.changed)
 
         cls.widget.setLayout(cls.layout)
         return cls.widget
@@ -69,9 +81,39 @@ class LogView:
     def refresh(cls):
         """Reload the data from the log."""
         cls.tree_log.clear()
-        for entry in TimeLog.retrieve_log():
-            item = LogViewEntry(entry)
-            cls.tree_log.addTopLevelItem(item)
+        cls.items = dict()
+        entries = TimeLog.iter_entries()
+        # The log is loaded now, if it wasn't already.
+        cls.sequence = TimeLog.get_sequence()
+        for entry in entries:
+            cls._add_item(entry)
+
+    @classmethod
+    def changed(cls):
+        """Show only the changes made to the log since it was last shown,
+        unless there are too many to catch up on.
+        """
+        changes = TimeLog.changes_since(cls.sequence)
+        if changes is None:
+            cls.refresh()
+            return
+
+        for change in changes:
+            if change.previous is not None:
+                item = cls.items.pop(change.previous.timestamp, None)
+                if item is not None:
+                    cls.tree_log.takeTopLevelItem(
+                        cls.tree_log.indexOfTopLevelItem(item)
+                    )
+            if change.entry is not None:
+                cls._add_item(change.entry)
+            cls.sequence = change.sequence
+
+    @classmethod
+    def _add_item(cls, entry):
+        item = LogViewEntry(entry)
+        cls.items[entry.timestamp] = item
+        cls.tree_log.addTopLevelItem(item)
 
     @classmethod
     def connect(cls, on_edit=None):
@@ -124,13 +166,13 @@ class LogView:
     @classmethod
     def _selected_entry(cls):
         item = cls.tree_log.selectedItems()[0]
-        return item.get_timestamp()
+        return item.get_entry_id()
 
     @classmethod
     def delete(cls):
-        timestamp = cls._selected_entry()
-        TimeLog.remove_from_log(timestamp)
-        cls.refresh()
+        timestamp = TimeLog.get_timestamp(cls._selected_entry())
+        if timestamp is not None:
+            TimeLog.remove_from_log(timestamp)
 
         cls.unselected()
         cls._set_mode_default()
@@ -157,6 +199,6 @@ class LogView:
 
     @classmethod
     def edit(cls):
-        timestamp = cls._selected_entry()
+        entry_id = cls._selected_entry()
         for callback in cls.edit_callback:
-            callback(timestamp)
+            callback(entry_id)
@@ -6,9 +6,11 @@ Allows viewing and editing application settings.
 
 from datetime import datetime
 
+from PySide6.QtCore import QTimer
 from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import (
     QCheckBox,
+    QComboBox,
     QGridLayout,
     QHBoxLayout,
     QLabel,
@@ -19,9 +21,12 @@ from PySide6.QtWidgets import (
     QWidget,
 )
 
+from timecard.data.journal import Journal
 from timecard.data.settings import Settings
 from timecard.data.timelog import TimeLog
 from timecard.interface.focus import Focus
+from timecard.interface.logview import LogView
+from timecard.logic.logwatcher import LogWatcher
 
 
 class SettingsView:
@@ -40,6 +45,18 @@ class SettingsView:
     txt_logdir = QLineEdit()
     lbl_logname = QLabel("Log Name")
     txt_logname = QLineEdit()
+    lbl_backend = QLabel("Log Storage")
+    cmb_backend = QComboBox()
+    lbl_logformat = QLabel("Log Format")
+    cmb_logformat = QComboBox()
+    lbl_shardby = QLabel("Split Log By")
+    cmb_shardby = QComboBox()
+    chk_journal = QCheckBox("Journal Log Changes")
+    chk_lazyload = QCheckBox("Load Log Entries on Demand")
+    chk_parallelload = QCheckBox("Load Log Using All Processors")
+    chk_logcache = QCheckBox("Cache Loaded Log")
+    btn_compact = QPushButton(QIcon.fromTheme("edit-clear"), "Compact Log")
+    lbl_compact = QLabel()
     chk_persist = QCheckBox("Keep in Notification Area")
     lbl_datefmt = QLabel("Timestamp Format")
     txt_datefmt = QLineEdit()
@@ -50,6 +67,7 @@ class SettingsView:
     btn_save = QPushButton(QIcon.fromTheme("document-save"), "Save")
 
     reload_log = False
+    convert_log = False
     reload_focus = False
 
     @classmethod
@@ -81,6 +99,75 @@ class SettingsView:
         cls.lbl_logname.setWhatsThis("The filename for the log.")
         cls.txt_logname.setWhatsThis("The filename for the log.")
 
+        cls.cmb_backend.addItem("File", "file")
+        cls.cmb_backend.addItem("SQLite Database", "sqlite")
+        cls.cmb_backend.currentIndexChanged.connect(cls.edited)
+        # Only edits by the user (not refresh()) schedule a reload.
+        cls.cmb_backend.activated.connect(cls.logpath_edited)
+        cls.cmb_backend.currentIndexChanged.connect(cls.backend_edited)
+        cls.lbl_backend.setWhatsThis("Where the log is stored.")
+        cls.cmb_backend.setWhatsThis(
+            "Where the log is stored. A database never needs to be loaded "
+            "or rewritten in full, so it stays fast as the log grows. "
+            "The log is moved over the next time it's loaded, and the old "
+            "copy is kept as a backup."
+        )
+
+        cls.cmb_logformat.addItem("Text", "text")
+        cls.cmb_logformat.addItem("Binary", "binary")
+        cls.cmb_logformat.currentIndexChanged.connect(cls.edited)
+        cls.cmb_logformat.currentIndexChanged.connect(cls.logformat_edited)
+        cls.lbl_logformat.setWhatsThis("The format the log is saved in.")
+        cls.cmb_logformat.setWhatsThis(
+            "The format the log is saved in. Text logs can be read and "
+            "edited by other programs. Binary logs load much faster."
+        )
+
+        cls.cmb_shardby.addItem("Nothing", "none")
+        cls.cmb_shardby.addItem("Month", "month")
+        cls.cmb_shardby.addItem("Year", "year")
+        cls.cmb_shardby.currentIndexChanged.connect(cls.edited)
+        cls.cmb_shardby.activated.connect(cls.logpath_edited)
+        cls.lbl_shardby.setWhatsThis(
+            "Split the log into a separate file for each month or year."
+        )
+        cls.cmb_shardby.setWhatsThis(
+            "Split the log into a separate file for each month or year, "
+            "so only the files you're using are ever loaded or saved. "
+            "Recommended for very large logs."
+        )
+
+        cls.chk_journal.stateChanged.connect(cls.edited)
+        cls.chk_journal.setWhatsThis(
+            "Append changes to a journal alongside the log, instead of "
+            "rewriting the entire log every time an entry is saved. "
+            "Recommended for very large logs."
+        )
+        cls.chk_lazyload.stateChanged.connect(cls.edited)
+        cls.chk_lazyload.clicked.connect(cls.logpath_edited)
+        cls.chk_lazyload.setWhatsThis(
+            "Only read log entries from the log file as they're needed, "
+            "instead of keeping the whole log in memory. "
+            "Recommended for very large logs."
+        )
+        cls.chk_parallelload.stateChanged.connect(cls.edited)
+        cls.chk_parallelload.clicked.connect(cls.logpath_edited)
+        cls.chk_parallelload.setWhatsThis(
+            "Split text logs into pieces which are read at the same time, "
+            "one on each processor. Recommended for very large logs."
+        )
+        cls.chk_logcache.stateChanged.connect(cls.edited)
+        cls.chk_logcache.setWhatsThis(
+            "Keep a copy of the loaded log in a file next to it, so it "
+            "loads faster next time, as long as it hasn't changed."
+        )
+
+        cls.btn_compact.clicked.connect(cls.compact)
+        cls.btn_compact.setWhatsThis(
+            "Rewrite the log with all journaled changes folded into it."
+        )
+        cls.lbl_compact.setWhatsThis("Results of the last log compaction.")
+
         cls.chk_persist.stateChanged.connect(cls.edited)
         cls.chk_persist.setWhatsThis(
             "When window is closed, keep application "
@@ -119,14 +206,34 @@ class SettingsView:
         cls.grid_layout.addWidget(cls.lbl_logname, 3, 0)
         cls.grid_layout.addWidget(cls.txt_logname, 3, 1)
 
-        cls.grid_layout.addWidget(cls.chk_persist, 4, 1)
+        cls.grid_layout.addWidget(cls.lbl_backend, 4, 0)
+        cls.grid_layout.addWidget(cls.cmb_backend, 4, 1)
+
+        cls.grid_layout.addWidget(cls.lbl_logformat, 5, 0)
+        cls.grid_layout.addWidget(cls.cmb_logformat, 5, 1)
+
+        cls.grid_layout.addWidget(cls.lbl_shardby, 6, 0)
+        cls.grid_layout.addWidget(cls.cmb_shardby, 6, 1)
+
+        cls.grid_layout.addWidget(cls.chk_journal, 7, 1)
+
+        cls.grid_layout.addWidget(cls.chk_lazyload, 8, 1)
 
-        cls.grid_layout.addWidget(cls.lbl_datefmt, 5, 0)
-        cls.grid_layout.addWidget(cls.txt_datefmt, 5, 1)
+        cls.grid_layout.addWidget(cls.chk_parallelload, 9, 1)
 
-        cls.grid_layout.addWidget(cls.lbl_datefmt_test, 6, 1)
+        cls.grid_layout.addWidget(cls.chk_logcache, 10, 1)
 
-        cls.grid_layout.addWidget(cls.chk_decdur, 7, 1)
+        cls.grid_layout.addWidget(cls.btn_compact, 11, 0)
+        cls.grid_layout.addWidget(cls.lbl_compact, 11, 1)
+
+        cls.grid_layout.addWidget(cls.chk_persist, 12, 1)
+
+        cls.grid_layout.addWidget(cls.lbl_datefmt, 13, 0)
+        cls.grid_layout.addWidget(cls.txt_datefmt, 13, 1)
+
+        cls.grid_layout.addWidget(cls.lbl_datefmt_test, 14, 1)
+
+        cls.grid_layout.addWidget(cls.chk_decdur, 15, 1)
 
         cls.grid_widget.setLayout(cls.grid_layout)
 
@@ -150,6 +257,29 @@ class SettingsView:
         """Schedule reload of log."""
         cls.reload_log = True
 
+    @classmethod
+    def backend_edited(cls):
+        """Enable only the settings which apply to the chosen storage."""
+        is_file = cls.cmb_backend.currentData() == "file"
+        for widget in (
+            cls.lbl_logformat,
+            cls.cmb_logformat,
+            cls.lbl_shardby,
+            cls.cmb_shardby,
+            cls.chk_journal,
+            cls.chk_lazyload,
+            cls.chk_parallelload,
+            cls.chk_logcache,
+        ):
+            widget.setEnabled(is_file)
+
+    @classmethod
+    def logformat_edited(cls):
+        """Schedule conversion of log, if the format is actually changing."""
+        cls.convert_log = (
+            cls.cmb_logformat.currentData() != Settings.get_logformat()
+        )
+
     @classmethod
     def datefmt_edited(cls):
         """Update the preview for the timestamp format."""
@@ -161,6 +291,32 @@ class SettingsView:
         """Reload settings for focus."""
         cls.reload_focus = True
 
+    @classmethod
+    def compact(cls):
+        """Compact the log in the background."""
+        cls.btn_compact.setEnabled(False)
+        cls.lbl_compact.setText("Compacting...")
+        TimeLog.compact()
+        cls.compact_check()
+
+    @classmethod
+    def compact_check(cls):
+        """Display the compaction results once it's finished."""
+        if Journal.is_compacting():
+            # Check back later, without blocking the interface.
+            QTimer.singleShot(250, cls.compact_check)
+            return
+
+        report = Journal.get_report()
+        if report is not None:
+            cls.lbl_compact.setText(
+                f"Reclaimed {report.bytes_reclaimed} bytes "
+                f"and {report.records_reclaimed} records."
+            )
+        else:
+            cls.lbl_compact.setText("Done.")
+        cls.btn_compact.setEnabled(True)
+
     @classmethod
     def edited(cls):
         """Enable the buttons for saving or reverting edits."""
@@ -178,6 +334,7 @@ class SettingsView:
         """Load and display current settings."""
         # Cancel any scheduled reloads.
         cls.reload_log = False
+        cls.convert_log = False
         cls.reload_focus = False
 
         # Load settings into interface.
@@ -186,6 +343,20 @@ class SettingsView:
         cls.chk_focus_random.setChecked(randomize)
         cls.txt_logdir.setText(Settings.get_logdir_str())
         cls.txt_logname.setText(Settings.get_logname())
+        cls.cmb_backend.setCurrentIndex(
+            cls.cmb_backend.findData(Settings.get_backend())
+        )
+        cls.backend_edited()
+        cls.cmb_logformat.setCurrentIndex(
+            cls.cmb_logformat.findData(Settings.get_logformat())
+        )
+        cls.cmb_shardby.setCurrentIndex(
+            cls.cmb_shardby.findData(Settings.get_shardby())
+        )
+        cls.chk_journal.setChecked(Settings.get_journal())
+        cls.chk_lazyload.setChecked(Settings.get_lazyload())
+        cls.chk_parallelload.setChecked(Settings.get_parallelload())
+        cls.chk_logcache.setChecked(Settings.get_logcache())
         cls.chk_persist.setChecked(Settings.get_persist())
         cls.txt_datefmt.setText(Settings.get_datefmt())
         cls.chk_decdur.setChecked(Settings.get_decdur())
@@ -197,11 +368,22 @@ class SettingsView:
     @classmethod
     def save(cls):
         """Save the new settings."""
+        # The log is shown in these formats, so it must be shown again
+        # if they change.
+        displayed = (Settings.get_datefmt(), Settings.get_decdur())
+
         Settings.set_focus(
             cls.spn_focus.value(), cls.chk_focus_random.isChecked()
         )
         Settings.set_logdir(cls.txt_logdir.text())
         Settings.set_logname(cls.txt_logname.text())
+        Settings.set_backend(cls.cmb_backend.currentData())
+        Settings.set_logformat(cls.cmb_logformat.currentData())
+        Settings.set_shardby(cls.cmb_shardby.currentData())
+        Settings.set_journal(cls.chk_journal.isChecked())
+        Settings.set_lazyload(cls.chk_lazyload.isChecked())
+        Settings.set_parallelload(cls.chk_parallelload.isChecked())
+        Settings.set_logcache(cls.chk_logcache.isChecked())
         Settings.set_persist(cls.chk_persist.isChecked())
         Settings.set_datefmt(cls.txt_datefmt.text())
         Settings.set_decdur(cls.chk_decdur.isChecked())
@@ -211,6 +393,13 @@ class SettingsView:
         if cls.reload_log:
             # We must do so AFTER updating the path (earlier)
             TimeLog.load(force=True)
+            LogWatcher.watch()
             cls.reload_log = False
+        elif (Settings.get_datefmt(), Settings.get_decdur()) != displayed:
+            LogView.refresh()
+        if cls.convert_log:
+            # Rewrite the log in the new format.
+            cls.compact()
+            cls.convert_log = False
         if cls.reload_focus:
             Focus.reload_settings()
@@ -8,7 +8,6 @@ from PySide6.QtGui import QIcon
 from PySide6.QtWidgets import QHBoxLayout, QPushButton, QWidget
 
 from timecard.data.timelog import TimeLog
-from timecard.interface.logview import LogView
 from timecard.interface.notes import Notes
 from timecard.interface.timedisplay import TimeDisplay
 
@@ -307,7 +306,6 @@ class TimeControls:
         notes = Notes.get_text()
         timestamp = TimeDisplay.get_timestamp()
         TimeLog.add_to_log(timestamp, *TimeDisplay.get_time(), notes)
-        LogView.refresh()
         Notes.clear()
         TimeDisplay.stop_time()
         TimeDisplay.reset_time(erase=True)
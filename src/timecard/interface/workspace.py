@@ -7,6 +7,7 @@ Switches between Views in the application.
 from PySide6.QtWidgets import QStackedLayout, QWidget
 
 from timecard.interface.aboutview import AboutView
+from timecard.interface.dashboardview import DashboardView
 from timecard.interface.editview import EditView
 from timecard.interface.logview import LogView
 from timecard.interface.quitview import QuitView
@@ -26,6 +27,7 @@ class Workspace:
         cls.layout.addWidget(SettingsView.build())
         cls.layout.addWidget(QuitView.build())
         cls.layout.addWidget(EditView.build())
+        cls.layout.addWidget(DashboardView.build())
 
         LogView.connect(on_edit=cls.set_mode_edit)
         EditView.connect(on_done=cls.edit_done)
@@ -35,7 +37,6 @@ class Workspace:
     @classmethod
     def set_mode_timelog(cls):
         cls.layout.setCurrentIndex(0)
-        LogView.refresh()
 
     @classmethod
     def set_mode_about(cls):
@@ -54,6 +55,12 @@ class Workspace:
         cls.layout.setCurrentIndex(4)
         EditView.load_item(entry)
 
+    @classmethod
+    def set_mode_dashboard(cls):
+        # The totals are kept up to date, so this is quick.
+        DashboardView.refresh()
+        cls.layout.setCurrentIndex(5)
+
     @classmethod
     def edit_done(cls):
         LogView.unselected()
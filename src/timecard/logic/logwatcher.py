@@ -0,0 +1,68 @@
+"""Log Watcher [Timecard]
+Author(s): Jason C. McDonald
+
+Watches the log file for changes made by other programs (such as a sync
+client, or another editor), and picks them up as they happen.
+"""
+
+from PySide6.QtCore import QFileSystemWatcher, QTimer
+
+from timecard.data.settings import Settings
+from timecard.data.timelog import TimeLog
+
+
+class LogWatcher:
+    # How long to wait for a burst of changes to finish, in milliseconds.
+    DELAY = 500
+
+    watcher = None
+    scheduled = False
+
+    @classmethod
+    def start(cls):
+        """Start watching the log file."""
+        cls.watcher = QFileSystemWatcher()
+        cls.watcher.fileChanged.connect(cls.changed)
+        # Files replaced by renaming another over them are only noticed
+        # by watching the directory they're in.
+        cls.watcher.directoryChanged.connect(cls.changed)
+        cls.watch()
+
+    @classmethod
+    def watch(cls):
+        """Watch the current log file, and the directory it's in."""
+        if cls.watcher is None:
+            return
+
+        path = Settings.get_logpath()
+        # Paths which don't exist yet can't be watched, so until the log
+        # is created, watch the nearest directory which does exist.
+        directory = path.parent
+        while not directory.exists() and directory != directory.parent:
+            directory = directory.parent
+        paths = {str(directory)}
+        if path.exists():
+            paths.add(str(path))
+
+        watched = set(cls.watcher.files() + cls.watcher.directories())
+        if watched - paths:
+            cls.watcher.removePaths(list(watched - paths))
+        if paths - watched:
+            cls.watcher.addPaths(list(paths - watched))
+
+    @classmethod
+    def changed(cls, _path):
+        """Check the log once a burst of changes is over."""
+        if not cls.scheduled:
+            cls.scheduled = True
+            QTimer.singleShot(cls.DELAY, cls.check)
+
+    @classmethod
+    def check(cls):
+        """Reload the log if it changed. TimeLog lets everything connected
+        to it know about the changes.
+        """
+        cls.scheduled = False
+        # A file which was replaced must be watched again.
+        cls.watch()
+        TimeLog.reload()